@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import asyncio
+import types
+import board
+import server
+from board import MatchBoard
+from protocol import FrameReader, ProtocolError, encode, read_command
+from server import GamesBase, move_of
+
+
+# asyncio counterpart of server.Server, with the same commands and the same
+# GamesBase pairing. A connection handler only lives until its player is
+# paired; from then on one task per match reads both players, judges their
+# moves on its own MatchBoard and relays them, and drain() holds the match
+# back while a socket is full. An idle match is two pending reads and costs
+# nothing.
+class AsyncServer:
+    def __init__(self, size=board.PLAYGROUND_SIZE):
+        # Each match task owns its MatchBoard, so GamesBase keeps none.
+        self.games_base = GamesBase(size, boards=False)
+        self._waiting = dict()
+        self._matches = set()
+
+    async def handle(self, reader, writer):
+        number = self.games_base.add_player()
+        player_data = self.games_base.players_data[number]
+        await self.start_player(number, player_data.size, player_data.side, self.games_base.get_opponent(number),
+                                reader, writer)
+
+    async def start_player(self, number, size, side, opponent_number, reader, writer):
+        player = types.SimpleNamespace(number=number, size=size, side=side, reader=reader, writer=writer,
+                                       frames=FrameReader(), read=None, paired=None)
+        writer.write(encode('b', (size,)) + encode('s', (side,)) + encode('t', (board.RED_PLAYER,)))
+
+        if opponent_number is None:
+            player.paired = asyncio.get_running_loop().create_future()
+            self._waiting[number] = player
+            await self._drain(player)
+            await self._wait(player)
+            return
+
+        opponent = self._waiting.pop(opponent_number, None)
+        if opponent is None:
+            # The opponent left while the pairing was on its way here (see
+            # sharded_server): it is met and lost at once.
+            writer.write(encode('o', (1,)) + encode('o', (0,)))
+            await self._drain(player)
+            while await self._read(player) is not None:
+                pass
+            self._leave(player)
+            return
+        match = asyncio.create_task(self.run_match(opponent, player))
+        self._matches.add(match)
+        match.add_done_callback(self._matches.discard)
+        opponent.paired.set_result(True)
+
+    async def _wait(self, player):
+        # The read pending when the opponent arrives is handed to the match,
+        # so nothing sent meanwhile is lost. Moves without an opponent are
+        # rejected, as in Server.
+        while not player.paired.done():
+            if player.read is None:
+                player.read = asyncio.ensure_future(self._read(player))
+            await asyncio.wait((player.read, player.paired), return_when=asyncio.FIRST_COMPLETED)
+            if player.read.done() and not player.paired.done():
+                command = player.read.result()
+                player.read = None
+                if command is None:
+                    del self._waiting[player.number]
+                    self._leave(player)
+                    return
+                player.writer.write(encode('r', command.values))
+                await self._drain(player)
+
+    async def run_match(self, red, blue):
+        players = red, blue
+        match = MatchBoard(red.size)
+        active = list(players)
+        try:
+            for player in players:
+                player.writer.write(encode('o', (1,)))
+                await self._drain(player)
+                if player.read is None:
+                    player.read = asyncio.ensure_future(self._read(player))
+
+            while active:
+                done, _ = await asyncio.wait([p.read for p in active], return_when=asyncio.FIRST_COMPLETED)
+                for player in list(active):
+                    if player.read not in done:
+                        continue
+                    try:
+                        command = player.read.result()
+                    except Exception:
+                        # Whatever broke this read, the player is lost.
+                        command = None
+                    if command is None:
+                        # The one left behind keeps its connection until it
+                        # leaves too, like the lost players of Server.
+                        active.remove(player)
+                        self._leave(player)
+                        for other in active:
+                            other.writer.write(encode('o', (0,)))
+                            await self._drain(other)
+                        continue
+                    player.read = asyncio.ensure_future(self._read(player))
+                    if len(active) < 2 or not match.play(move_of(command), player.side):
+                        player.writer.write(encode('r', command.values))
+                        await self._drain(player)
+                        continue
+                    other = blue if player is red else red
+                    other.writer.write(encode('m', command.values))
+                    if match.result:
+                        for p in players:
+                            p.writer.write(encode('w', (match.result,)))
+                        await self._drain(player)
+                    await self._drain(other)
+        finally:
+            # Only reached with players still active if the match itself
+            # failed or was cancelled: each of them is told and let go, so
+            # GamesBase does not keep them.
+            for player in active:
+                if player.read is not None:
+                    player.read.cancel()
+                if not player.writer.is_closing():
+                    player.writer.write(encode('o', (0,)))
+                self._leave(player)
+
+    @staticmethod
+    async def _read(player):
+        # The next move, or None once the player is gone: a closed or broken
+        # connection, a malformed frame or any other command, on which
+        # Server closes the connection too.
+        try:
+            command = await read_command(player.reader, player.frames)
+        except (OSError, ProtocolError):
+            return None
+        if command is None or command.head != 'm':
+            return None
+        return command
+
+    @staticmethod
+    async def _drain(player):
+        try:
+            await player.writer.drain()
+        except ConnectionError:
+            pass
+
+    def _leave(self, player):
+        self.games_base.remove_player(player.number)
+        player.writer.close()
+
+    async def serve(self, host=None, port=None, ready=None):
+        host = server.HOST if host is None else host
+        port = server.PORT if port is None else port
+        listener = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        print('SERVER: listen')
+        if ready is not None:
+            # Reports the bound port, for callers listening on port 0.
+            ready(listener.sockets[0].getsockname()[1])
+        async with listener:
+            await listener.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("SERVER: caught keyboard interrupt, exiting")
+
+
+if __name__ == '__main__':
+    import sys
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else board.PLAYGROUND_SIZE
+    AsyncServer(size).run()
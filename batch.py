@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import numpy
+from board import HexTools, CELL_EMPTY, CELL_RED, CELL_BLUE, RED_WIN, BLUE_WIN
+from evaluator import UNREACHABLE
+
+# Positions are int8 arrays of shape (N, size, size) holding CELL_EMPTY,
+# CELL_RED or CELL_BLUE. Index [n, row, col] is the inner cell
+# Coord(x=col + y // 2 + 1, y=row + 1) of board n; red joins row 0 to the
+# last row, blue joins column 0 to the last column. Cube x runs along a row
+# and cube z is the row, so each hex direction is a fixed (row, col) offset.
+DIRECTIONS = [(d.z, d.x) for d in HexTools()._cube_directions]
+
+
+def to_position(board):
+    position = numpy.zeros((board.size, board.size), dtype=numpy.int8)
+    for stones, state in ((board.list_of_red, CELL_RED), (board.list_of_blue, CELL_BLUE)):
+        for hex_coords in stones:
+            row = hex_coords.y - 1
+            position[row, hex_coords.x - hex_coords.y // 2 - 1] = state
+    return position
+
+
+def to_positions(boards):
+    return numpy.stack([to_position(b) for b in boards])
+
+
+def _slices(offset, size):
+    # Target and source slices moving a plane by offset along one axis.
+    if offset >= 0:
+        return slice(offset, size), slice(0, size - offset)
+    return slice(0, size + offset), slice(-offset, size)
+
+
+def _shifted(size):
+    return [(_slices(dr, size), _slices(dc, size)) for dr, dc in DIRECTIONS]
+
+
+def dilate(mask):
+    grown = mask.copy()
+    for (rows_to, rows_from), (cols_to, cols_from) in _shifted(mask.shape[-1]):
+        grown[:, rows_to, cols_to] |= mask[:, rows_from, cols_from]
+    return grown
+
+
+def flood(seed, allowed):
+    # Boards whose reach stopped growing are dropped from the working set,
+    # so long snakes on a few boards do not keep the whole batch busy.
+    reach = seed & allowed
+    active = numpy.arange(reach.shape[0])
+    current, current_allowed = reach, allowed
+    while active.size:
+        grown = dilate(current) & current_allowed
+        changed = (grown != current).any(axis=(1, 2))
+        reach[active] = grown
+        if not changed.all():
+            active = active[changed]
+            grown, current_allowed = grown[changed], current_allowed[changed]
+        current = grown
+    return reach
+
+
+def _edge_seeds(own, side_is_red, edge=0):
+    seed = numpy.zeros_like(own)
+    if side_is_red:
+        seed[:, edge, :] = own[:, edge, :]
+    else:
+        seed[:, :, edge] = own[:, :, edge]
+    return seed
+
+
+def reach_masks(positions):
+    red = positions == CELL_RED
+    blue = positions == CELL_BLUE
+    return flood(_edge_seeds(red, True), red), flood(_edge_seeds(blue, False), blue)
+
+
+def winning_chains(positions, red_reach, blue_reach, winners):
+    # Stones connected to both edges of the winner of each board.
+    chains = numpy.zeros(positions.shape, dtype=bool)
+    for win, state, reach, side_is_red in ((RED_WIN, CELL_RED, red_reach, True),
+                                           (BLUE_WIN, CELL_BLUE, blue_reach, False)):
+        won = winners == win
+        if won.any():
+            own = positions[won] == state
+            chains[won] = reach[won] & flood(_edge_seeds(own, side_is_red, -1), own)
+    return chains
+
+
+def winners_from_reach(red_reach, blue_reach):
+    winners = numpy.zeros(red_reach.shape[0], dtype=numpy.int8)
+    winners[blue_reach[:, :, -1].any(axis=1)] = BLUE_WIN
+    winners[red_reach[:, -1, :].any(axis=1)] = RED_WIN
+    return winners
+
+
+def connection_distances(positions, state):
+    # Vectorised counterpart of Evaluator.distance: repeated min-plus
+    # relaxation over the six directions until no distance changes.
+    cost = numpy.full(positions.shape, UNREACHABLE, dtype=numpy.int64)
+    cost[positions == CELL_EMPTY] = 1
+    cost[positions == state] = 0
+
+    if state == CELL_BLUE:
+        cost = cost.transpose(0, 2, 1)
+        directions = [(dc, dr) for dr, dc in DIRECTIONS]
+    else:
+        directions = DIRECTIONS
+    size = positions.shape[-1]
+    shifted = [(_slices(dr, size), _slices(dc, size)) for dr, dc in directions]
+
+    dist = numpy.full(cost.shape, UNREACHABLE, dtype=numpy.int64)
+    dist[:, 0, :] = cost[:, 0, :]
+    while True:
+        best = dist.copy()
+        for (rows_to, rows_from), (cols_to, cols_from) in shifted:
+            numpy.minimum(best[:, rows_to, cols_to], dist[:, rows_from, cols_from] + cost[:, rows_to, cols_to],
+                          out=best[:, rows_to, cols_to])
+        numpy.minimum(best, UNREACHABLE, out=best)
+        if numpy.array_equal(best, dist):
+            break
+        dist = best
+    return dist[:, -1, :].min(axis=1)
+
+
+def winners(positions, distances=False):
+    positions = numpy.asarray(positions, dtype=numpy.int8)
+    result = winners_from_reach(*reach_masks(positions))
+    if not distances:
+        return result
+    return result, connection_distances(positions, CELL_RED), connection_distances(positions, CELL_BLUE)
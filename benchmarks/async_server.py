@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import asyncio
+import multiprocessing
+import sys
+from async_server import AsyncServer
+from load_generator import LoadGenerator, raise_file_limit
+
+CONNECTIONS = 10000
+SECONDS = 20
+MOVE_INTERVAL = 5.
+
+
+def serve(ports):
+    raise_file_limit()
+    asyncio.run(AsyncServer().serve(port=0, ready=ports.put))
+
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else CONNECTIONS
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else SECONDS
+    connections -= connections % 2
+    limit = raise_file_limit()
+    if connections + 100 > limit:
+        print('open file limit %i is too low for %i connections' % (limit, connections))
+        return
+
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(ports,), daemon=True)
+    process.start()
+    port = ports.get()
+    try:
+        asyncio.run(LoadGenerator(port=port, connections=connections, rate=1. / MOVE_INTERVAL,
+                                  seconds=seconds).run())
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
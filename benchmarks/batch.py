@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import random
+import time
+import numpy
+import batch
+from board import Board
+from playout import PlayoutEngine
+from benchmarks.common import report
+
+SIZES = 11, 19
+CORPUS_SIZE = 500
+BATCH_SIZE = 10000
+
+
+def corpus(size, count, seed=0):
+    # Random partial and finished games, checked one by one with Board.
+    rng = random.Random(seed)
+    boards = list()
+    for _ in range(count):
+        board = Board(size)
+        cells = sorted(board.active_area, key=lambda c: (c.y, c.x))
+        rng.shuffle(cells)
+        for i, hex_ in enumerate(cells[:rng.randint(0, len(cells))]):
+            board.add_hex(hex_, i % 2)
+        boards.append(board)
+    return boards
+
+
+def main():
+    for size in SIZES:
+        boards = corpus(size, CORPUS_SIZE)
+        expected = numpy.array([b.check_result() for b in boards], dtype=numpy.int8)
+        if not numpy.array_equal(batch.winners(batch.to_positions(boards)), expected):
+            raise AssertionError('batch winners differ from check_result on %ix%i' % (size, size))
+
+        positions = numpy.random.default_rng(0).integers(1, 3, size=(BATCH_SIZE, size, size), dtype=numpy.int8)
+        start = time.perf_counter()
+        batch.winners(positions)
+        report('%ix%i winners per filled board' % (size, size), (time.perf_counter() - start) / BATCH_SIZE)
+        start = time.perf_counter()
+        batch.winners(positions[:BATCH_SIZE // 10], distances=True)
+        report('%ix%i winners and distances per board' % (size, size),
+               (time.perf_counter() - start) / (BATCH_SIZE // 10))
+
+        engine = PlayoutEngine(size, seed=0)
+        start = time.perf_counter()
+        engine.run(boards[0], 0, BATCH_SIZE)
+        report('%ix%i playout with ownership' % (size, size), (time.perf_counter() - start) / BATCH_SIZE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import random
+import time
+from board import Board
+
+
+def measure(func, *args, number=None, repeat=5):
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func(*args)
+            if time.perf_counter() - start > 0.05:
+                break
+            number *= 2
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def random_board(size, density, seed=0, board_class=Board):
+    board = board_class(size)
+    cells = sorted(board.active_area, key=lambda c: (c.y, c.x))
+    random.Random(seed).shuffle(cells)
+    for i, hex_ in enumerate(cells[:int(len(cells) * density)]):
+        board.add_hex(hex_, i % 2)
+    return board
+
+
+def report(name, seconds):
+    print('%-48s %12.2f us' % (name, seconds * 1e6))
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+from evaluator import get_evaluator
+from benchmarks.common import measure, random_board, report
+
+SIZES = 11, 19
+DENSITIES = 0.1, 0.3, 0.5
+
+
+def main():
+    for size in SIZES:
+        evaluator = get_evaluator(size)
+        for density in DENSITIES:
+            board = random_board(size, density)
+            label = '%ix%i %i%% stones' % (size, size, density * 100)
+            report(label + ' distances', measure(evaluator.distances, board))
+            report(label + ' evaluate (with maps)', measure(evaluator.evaluate, board))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import random
+from server import GamesBase
+from benchmarks.common import measure, report
+
+PLAYERS = 1000, 10000, 50000
+EVENTS = 1000
+
+
+def scanned_lookups(games, number):
+    # The list scans GamesBase used to run on every write event.
+    if [p for p in games if number in p]:
+        game = [g for g in games if number in g][0]
+        return [c for c in game if c != number][0]
+
+
+def indexed_lookups(games_base, number):
+    if games_base.check_have_pair(number):
+        return games_base.get_opponent(number)
+
+
+def write_events(lookups, state, numbers):
+    for number in numbers:
+        lookups(state, number)
+
+
+def churn(games_base, numbers):
+    # Players leaving and joining, as on a busy server.
+    for number in numbers:
+        games_base.remove_player(number)
+        games_base.add_player()
+
+
+def main():
+    for players in PLAYERS:
+        games_base = GamesBase()
+        for _ in range(players):
+            games_base.add_player()
+        numbers = [random.Random(i).randrange(1, players + 1) for i in range(EVENTS)]
+        label = '%i players' % players
+        report(label + ' write event (indexed)',
+               measure(write_events, indexed_lookups, games_base, numbers) / EVENTS)
+        if players <= 10000:
+            games = sorted(set(games_base.games.values()))
+            report(label + ' write event (scanned)',
+                   measure(write_events, scanned_lookups, games, numbers[:10], repeat=1) / 10)
+        report(label + ' add player', measure(games_base.add_player))
+        leaving = random.Random(0).sample(sorted(games_base.players_data), EVENTS)
+        report(label + ' leave and join', measure(churn, games_base, leaving, number=1, repeat=1) / EVENTS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+from board import HexTools, HintsFinder
+from benchmarks.common import measure, random_board, report
+
+SIZES = 11, 19
+DENSITY = 0.3
+
+
+def find_path(hex_tools, board):
+    start = next(iter(board.boundary_red_1))
+    goal = next(iter(board.boundary_red_2))
+    return hex_tools.best_way(start, goal, area=board.active_area | board.all_red)
+
+
+def main():
+    for size in SIZES:
+        board = random_board(size, DENSITY)
+        active_area = board.active_area
+        for name, hex_tools, finder in (('computed', HexTools(), HintsFinder()),
+                                        ('table', HexTools(size), HintsFinder(size))):
+            report('%ix%i hints (%s)' % (size, size, name),
+                   measure(finder.find_all_hints, board.list_of_red, active_area))
+            report('%ix%i best_way (%s)' % (size, size, name),
+                   measure(find_path, hex_tools, board))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+from board import RED_PLAYER
+from inferior import get_inferior
+from benchmarks.common import measure, random_board, report
+
+SIZES = 11, 19
+DENSITIES = 0.2, 0.4, 0.6
+SAMPLES = 20
+
+
+def main():
+    for size in SIZES:
+        inferior = get_inferior(size)
+        for density in DENSITIES:
+            legal = reduced = 0
+            for seed in range(SAMPLES):
+                board = random_board(size, density, seed)
+                legal += len(board.legal_moves())
+                reduced += len(inferior.reduced_moves(board, RED_PLAYER))
+            label = '%ix%i %i%% stones' % (size, size, density * 100)
+            print('%-48s %5.1f -> %5.1f moves (%.0f%% pruned)'
+                  % (label + ' branching factor', legal / SAMPLES, reduced / SAMPLES,
+                     100. * (legal - reduced) / legal))
+            report(label + ' analyse', measure(inferior.analyse_board, board, RED_PLAYER))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+from mcts import MCTSPlayer
+from benchmarks.common import random_board
+
+SIZES = 11, 19
+SECONDS = 2.0
+
+
+def main(workers):
+    for size in SIZES:
+        board = random_board(size, 0.2)
+        for n in workers:
+            player = MCTSPlayer(size, seconds=SECONDS, workers=n)
+            try:
+                player.search(board, 0)
+            finally:
+                player.close()
+            stats = player.last_stats
+            print('%ix%i %2i workers %12.0f playouts/s' % (size, size, n, stats.playouts_per_second))
+
+
+if __name__ == '__main__':
+    cores = os.cpu_count() or 1
+    main([int(w) for w in sys.argv[1:]] or sorted({1, max(1, cores // 2), cores}))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import socket
+from protocol import FrameReader, FrameWriter, RECEIVE_SIZE
+from benchmarks.common import measure
+
+BURSTS = 1, 4, 64
+VALUE_DIGITS = 4
+MESSAGE_SIZE = 1 + 2 * VALUE_DIGITS
+
+
+def legacy_send(connection, head, values):
+    # The fixed 9-byte text commands, one send() each.
+    command = head + ''.join('%0*i' % (VALUE_DIGITS, v) for v in values)
+    connection.send(command.encode('utf-8'))
+
+
+def legacy_receive(connection):
+    message = connection.recv(1) + connection.recv(MESSAGE_SIZE - 1)
+    return message[:1].decode('utf-8'), (int(message[1:1 + VALUE_DIGITS]), int(message[1 + VALUE_DIGITS:]))
+
+
+def legacy_burst(sender, receiver, messages):
+    for values in messages:
+        legacy_send(sender, 'm', values)
+    for _ in messages:
+        legacy_receive(receiver)
+
+
+def framed_burst(sender, receiver, messages, writer, frames):
+    for values in messages:
+        writer.queue('m', values)
+    while not writer.flush(sender):
+        pass
+    while len(frames.commands) < len(messages):
+        frames.feed(receiver.recv(RECEIVE_SIZE))
+    frames.commands.clear()
+
+
+def main():
+    sender, receiver = socket.socketpair()
+    writer, frames = FrameWriter(), FrameReader()
+    print('%-24s %14s %14s %8s' % ('', 'legacy msgs/s', 'framed msgs/s', 'speedup'))
+    for burst in BURSTS:
+        messages = [(i % 19, i % 23) for i in range(burst)]
+        legacy = measure(legacy_burst, sender, receiver, messages)
+        framed = measure(framed_burst, sender, receiver, messages, writer, frames)
+        print('%-24s %14.0f %14.0f %7.1fx'
+              % ('%i messages per burst' % burst, burst / legacy, burst / framed, legacy / framed))
+    sender.close()
+    receiver.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from board import HexTools, HintsFinder, Point
+from benchmarks.common import measure, random_board, report
+
+SIZES = 11, 51, 101
+DENSITY = 0.3
+HEX_SIZE = 25
+
+
+def recomputed_active_area(board):
+    # The region algebra Board used to run on every active_area access.
+    v = board.playground - (board.boundary_red_1 | board.boundary_red_2) \
+        - (board.boundary_blue_1 | board.boundary_blue_2) - board.boundary_corners
+    return v - board.list_of_red - board.list_of_blue
+
+
+def click(board, hex_tools, points, active_area):
+    for point in points:
+        hex_tools.pixel_to_point_hex(point, HEX_SIZE) in active_area(board)
+
+
+def hints(board, finder, active_area):
+    finder.find_all_hints(board.list_of_red, active_area(board))
+    finder.find_all_hints(board.list_of_blue, active_area(board))
+
+
+def main():
+    for size in SIZES:
+        board = random_board(size, DENSITY)
+        hex_tools = HexTools()
+        finder = HintsFinder(size)
+        points = [Point(i * 7 % (size * 40), i * 13 % (size * 35)) for i in range(100)]
+        for name, active_area in (('recomputed', recomputed_active_area),
+                                  ('cached', lambda b: b.active_area)):
+            report('%ix%i 100 clicks (%s)' % (size, size, name),
+                   measure(click, board, hex_tools, points, active_area))
+            report('%ix%i hints (%s)' % (size, size, name),
+                   measure(hints, board, finder, active_area, repeat=3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import random
+import sys
+import time
+from board import Board, HintIndex, HintsFinder
+from bitboard import BitBoard
+from benchmarks.common import measure, report
+
+SIZES = 11, 19, 27, 51, 75, 101
+MODELS = ('set', Board), ('bit', BitBoard)
+
+
+def play_random_game(board_class, size, seed=0):
+    board = board_class(size)
+    hint_index = HintIndex(board)
+    cells = sorted(board.active_area, key=lambda c: (c.y, c.x))
+    random.Random(seed).shuffle(cells)
+
+    add_time = check_time = hint_time = 0.
+    moves = 0
+    for turn, hex_ in zip(range(len(cells)), cells):
+        turn %= 2
+        start = time.perf_counter()
+        board.add_hex(hex_, turn)
+        add_end = time.perf_counter()
+        result = board.check_result()
+        check_end = time.perf_counter()
+        hint_index.add_hex(hex_, turn)
+        hint_end = time.perf_counter()
+
+        add_time += add_end - start
+        check_time += check_end - add_end
+        hint_time += hint_end - check_end
+        moves += 1
+        if result:
+            break
+    return board, moves, add_time / moves, check_time / moves, hint_time / moves
+
+
+def main(sizes):
+    for size in sizes:
+        for name, board_class in MODELS:
+            board, moves, add, check, hint = play_random_game(board_class, size)
+            label = '%ix%i %s (%i moves)' % (size, size, name, moves)
+            report(label + ' add_hex', add)
+            report(label + ' check_result', check)
+            report(label + ' hint index', hint)
+        finder = HintsFinder(size)
+        report('%ix%i full hint scan' % (size, size),
+               measure(finder.find_all_hints, board.list_of_red, board.active_area, repeat=1))
+
+
+if __name__ == '__main__':
+    main([int(s) for s in sys.argv[1:]] or SIZES)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import time
+import board
+import server
+from board import Board, Coord
+from sharded_server import ShardedServer
+from protocol import FrameReader, encode, read_command
+from load_generator import raise_file_limit
+
+CONNECTIONS = 2000
+SECONDS = 5.
+# Large enough that random games are not over within SECONDS.
+SIZE = 19
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((server.HOST, 0))
+        return s.getsockname()[1]
+
+
+@functools.lru_cache(maxsize=None)
+def inner_cells(size):
+    return sorted(Board(size).active_area, key=lambda c: (c.y, c.x))
+
+
+# Paired players answer every move with a random free cell as fast as they
+# can, so the relay rate is limited by the server only. Each player knows
+# every move of its game, so none is rejected; a game runs SECONDS at most
+# on the SIZE board.
+async def player(port, paired, start, stop):
+    reader, writer = await asyncio.open_connection(server.HOST, port)
+    frames = FrameReader()
+    setup = [await read_command(reader, frames) for _ in range(4)]
+    size, side = setup[0].values[0], setup[1].values[0]
+    free = list(inner_cells(size))
+    random.shuffle(free)
+    taken = set()
+
+    def next_move():
+        while free:
+            move = free.pop()
+            if move not in taken:
+                taken.add(move)
+                return move.x, move.y
+        return None
+
+    paired.set_result(None)
+    await start
+    moves = 0
+    if side == board.RED_PLAYER:
+        writer.write(encode('m', next_move()))
+    while time.perf_counter() < stop[0]:
+        command = await read_command(reader, frames)
+        if command is None or command.head != 'm':
+            break
+        moves += 1
+        taken.add(Coord(*command.values))
+        move = next_move()
+        if move is None:
+            break
+        writer.write(encode('m', move))
+        await writer.drain()
+    writer.close()
+    return moves
+
+
+async def generate(port, connections, seconds, barrier):
+    loop = asyncio.get_running_loop()
+    start = loop.create_future()
+    stop = [0.]
+    paired = [loop.create_future() for _ in range(connections)]
+    tasks = [asyncio.create_task(player(port, p, start, stop)) for p in paired]
+    # Every load process has its players paired before anyone moves.
+    await asyncio.gather(*paired)
+    await loop.run_in_executor(None, barrier.wait)
+    stop[0] = time.perf_counter() + seconds
+    start.set_result(None)
+    done, _ = await asyncio.wait(tasks, timeout=seconds + 5)
+    return sum(t.result() for t in done if not t.exception())
+
+
+def load_process(port, connections, seconds, barrier, results):
+    raise_file_limit()
+    results.put(asyncio.run(generate(port, connections, seconds, barrier)))
+
+
+def run(workers, connections, seconds):
+    port = free_port()
+    sharded = ShardedServer(SIZE, workers=workers)
+    ready = multiprocessing.Queue()
+    sharded.start(port, ready.put)
+    for _ in range(workers):
+        ready.get()
+
+    loaders = workers
+    barrier = multiprocessing.Barrier(loaders)
+    results = multiprocessing.Queue()
+    per_loader = connections // loaders // 2 * 2
+    processes = [multiprocessing.Process(target=load_process,
+                                         args=(port, per_loader, seconds, barrier, results))
+                 for _ in range(loaders)]
+    try:
+        for process in processes:
+            process.start()
+        moves = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+    finally:
+        sharded.stop()
+    return moves / seconds
+
+
+def main():
+    workers = [int(a) for a in sys.argv[1:]] or sorted({1, 2, os.cpu_count() or 1})
+    print('%i CPUs, %i connections, %.0f s per run' % (os.cpu_count() or 1, CONNECTIONS, SECONDS))
+    base = None
+    for n in workers:
+        rate = run(n, CONNECTIONS, SECONDS)
+        base = base or rate
+        print('%2i workers %10.0f moves/s  x%.2f' % (n, rate, rate / base))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import platform
+import random
+import socket
+import sys
+from board import HexTools, HintsFinder, Point
+from game import get_geometry
+from benchmarks.common import measure, random_board
+from benchmarks.protocol import framed_burst
+from protocol import FrameReader, FrameWriter
+
+# Every case runs on each size and, where stones matter, each density.
+# Boards and points come from fixed seeds, so two runs time the same work.
+SIZES = 11, 19, 27
+DENSITIES = 0.1, 0.3, 0.5
+BURSTS = 1, 4, 64
+POINTS = 64
+THRESHOLD = 0.1
+FORMAT = 1
+
+
+def check_result(board):
+    # Board caches its result, so it is cleared to time the full check.
+    board.result = 0
+    return board.check_result()
+
+
+def find_path(hex_tools, board):
+    start = next(iter(board.boundary_red_1))
+    goal = next(iter(board.boundary_red_2))
+    return hex_tools.best_way(start, goal, area=board.active_area | board.all_red)
+
+
+def pixel_lookups(hex_tools, points, hex_size):
+    for point in points:
+        hex_tools.pixel_to_point_hex(point, hex_size)
+
+
+def cell_lookups(geometry, points):
+    for point in points:
+        geometry.cell_at(point.x, point.y)
+
+
+def board_cases(size):
+    hex_tools = HexTools(size)
+    finder = HintsFinder(size)
+    for density in DENSITIES:
+        board = random_board(size, density)
+        label = 'size=%i density=%.1f' % (size, density)
+        center = sorted(board.active_area, key=lambda c: (c.y, c.x))[len(board.active_area) // 2]
+        yield 'best_way ' + label, find_path, hex_tools, board
+        yield 'hex_reachable ' + label, hex_tools.hex_reachable, center, size // 2, board.list_of_red | board.list_of_blue
+        yield 'find_all_hints ' + label, finder.find_all_hints, board.list_of_red, board.active_area
+        yield 'check_result ' + label, check_result, board
+
+
+def geometry_cases(size):
+    hex_tools = HexTools(size)
+    board = random_board(size, 0)
+    cells = sorted(board.active_area, key=lambda c: (c.y, c.x))
+    center = cells[len(cells) // 2]
+    for radius in 1, size // 2:
+        label = 'size=%i radius=%i' % (size, radius)
+        yield 'get_ring ' + label, hex_tools.get_ring, center, radius
+        yield 'get_range ' + label, hex_tools.get_range, center, radius
+    yield 'line_draw size=%i' % size, hex_tools.line_draw, cells[0], cells[-1]
+    rng = random.Random(size)
+    hex_size = 25
+    points = [Point(rng.uniform(0, size * 2 * hex_size), rng.uniform(0, size * 2 * hex_size)) for _ in range(POINTS)]
+    yield 'pixel_to_point_hex size=%i (%i points)' % (size, POINTS), pixel_lookups, hex_tools, points, hex_size
+    geometry = get_geometry(size, hex_size, (0, 0))
+    yield 'HexGeometry.cell_at size=%i (%i points)' % (size, POINTS), cell_lookups, geometry, points
+
+
+def protocol_cases(sender, receiver):
+    writer, frames = FrameWriter(), FrameReader()
+    for burst in BURSTS:
+        messages = [(i % 19, i % 23) for i in range(burst)]
+        yield 'socketpair send/receive burst=%i' % burst, framed_burst, sender, receiver, messages, writer, frames
+
+
+def run(pattern=None):
+    sender, receiver = socket.socketpair()
+    cases = [case for size in SIZES for case in board_cases(size)]
+    cases += [case for size in SIZES for case in geometry_cases(size)]
+    cases += list(protocol_cases(sender, receiver))
+    results = dict()
+    try:
+        for name, func, *args in cases:
+            if pattern and pattern not in name:
+                continue
+            results[name] = measure(func, *args)
+            print('%-56s %12.2f us' % (name, results[name] * 1e6), file=sys.stderr)
+    finally:
+        sender.close()
+        receiver.close()
+    return {'format': FORMAT, 'python': platform.python_version(), 'machine': platform.machine(),
+            'results': results}
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    # Prints every case found in both runs; returns the regressed names.
+    regressions = list()
+    for name, seconds in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = seconds / base
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = 'faster'
+        print('%-56s %10.2f us %10.2f us %6.2fx %s' % (name, base * 1e6, seconds * 1e6, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the hot paths and write the results as JSON.')
+    parser.add_argument('-o', '--output', help='write the JSON here instead of stdout')
+    parser.add_argument('-c', '--compare', metavar='BASELINE', help='compare with a stored JSON run')
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD,
+                        help='slowdown ratio flagged as a regression (default %(default)s)')
+    parser.add_argument('-k', '--filter', help='only run cases whose name contains this text')
+    args = parser.parse_args()
+
+    current = run(args.filter)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=1, sort_keys=True)
+    elif not args.compare:
+        json.dump(current, sys.stdout, indent=1, sort_keys=True)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print('%i regressions over %.0f%%' % (len(regressions), args.threshold * 100))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+import functools
+from board import Coord, HexTools, Board, get_table, get_zobrist, PLAYGROUND_SIZE, RED_WIN, BLUE_WIN
+
+
+# Inner cells are stored row by row in one Python integer per side. Every row
+# has one extra always-empty guard bit, so shifting a mask by one column can
+# not wrap a stone onto the neighbouring row.
+class BitMasks:
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 1
+        # Cube x grows along a row and cube z is the row, so every direction
+        # is a fixed shift of the bit index.
+        self.shifts = sorted({d.z * self.stride + d.x for d in HexTools()._cube_directions})
+
+        self.cells = 0
+        self.red_edge_1 = 0
+        self.red_edge_2 = 0
+        self.blue_edge_1 = 0
+        self.blue_edge_2 = 0
+        for row in range(size):
+            for col in range(size):
+                bit = 1 << self.index(row, col)
+                self.cells |= bit
+                if row == 0:
+                    self.red_edge_1 |= bit
+                if row == size - 1:
+                    self.red_edge_2 |= bit
+                if col == 0:
+                    self.blue_edge_1 |= bit
+                if col == size - 1:
+                    self.blue_edge_2 |= bit
+
+        # Zobrist keys of board.get_zobrist(size) by bit index, so a bitboard
+        # position hashes to the same value as the Board it encodes.
+        zobrist = get_zobrist(size)
+        table = get_table(size)
+        self.zobrist = [[0] * (size * self.stride) for _ in zobrist.keys]
+        for row in range(size):
+            for col in range(size):
+                i = self.index(row, col)
+                for keys, bit_keys in zip(zobrist.keys, self.zobrist):
+                    bit_keys[i] = keys[table.index[self.coord_of(i)]]
+
+        self.neighbors = [0] * (size * self.stride)
+        for row in range(size):
+            for col in range(size):
+                i = self.index(row, col)
+                self.neighbors[i] = self.dilate(1 << i)
+
+    def index(self, row, col):
+        return row * self.stride + col
+
+    def index_of(self, hex_coords):
+        return self.index(hex_coords.y - 1, hex_coords.x - hex_coords.y // 2 - 1)
+
+    def coord_of(self, index):
+        row, col = divmod(index, self.stride)
+        y = row + 1
+        return Coord(col + y // 2 + 1, y)
+
+    def encode(self, board):
+        red = 0
+        for hex_coords in board.list_of_red:
+            red |= 1 << self.index_of(hex_coords)
+        blue = 0
+        for hex_coords in board.list_of_blue:
+            blue |= 1 << self.index_of(hex_coords)
+        return red, blue
+
+    def hash(self, red, blue):
+        value = 0
+        for stones, keys in ((red, self.zobrist[0]), (blue, self.zobrist[1])):
+            for i in self.iter_bits(stones):
+                value ^= keys[i]
+        return value
+
+    def dilate(self, mask):
+        grown = mask
+        for shift in self.shifts:
+            if shift > 0:
+                grown |= mask << shift
+            else:
+                grown |= mask >> -shift
+        return grown & self.cells & ~mask
+
+    def flood(self, seed, allowed):
+        reach = seed & allowed
+        while True:
+            grown = reach | (self.dilate(reach) & allowed)
+            if grown == reach:
+                return reach
+            reach = grown
+
+    def connects(self, stones, edge_1, edge_2):
+        return bool(self.flood(stones & edge_1, stones) & edge_2)
+
+    def winner(self, red, blue):
+        if self.connects(red, self.red_edge_1, self.red_edge_2):
+            return RED_WIN
+        if self.connects(blue, self.blue_edge_1, self.blue_edge_2):
+            return BLUE_WIN
+        return 0
+
+    def empty(self, red, blue):
+        return self.cells & ~(red | blue)
+
+    def shortest_chain(self, stones, edge_1, edge_2):
+        layers = [stones & edge_1]
+        seen = layers[0]
+        while layers[-1] and not layers[-1] & edge_2:
+            layer = self.dilate(layers[-1]) & stones & ~seen
+            seen |= layer
+            layers.append(layer)
+        if not layers[-1]:
+            return 0
+
+        current = layers[-1] & edge_2
+        current &= -current
+        chain = current
+        for layer in reversed(layers[:-1]):
+            current = self.dilate(current) & layer
+            current &= -current
+            chain |= current
+        return chain
+
+    @staticmethod
+    def iter_bits(mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+
+@functools.lru_cache(maxsize=None)
+def get_masks(size):
+    return BitMasks(size)
+
+
+# Drop-in replacement for Board: the Coord sets are still kept for rendering,
+# while connectivity and legal moves run on the bitsets.
+class BitBoard(Board):
+    def __init__(self, size=PLAYGROUND_SIZE):
+        super().__init__(size)
+        self.masks = get_masks(size)
+        self.red = 0
+        self.blue = 0
+
+    def index_of(self, hex_coords):
+        return self.masks.index_of(hex_coords)
+
+    def coord_of(self, index):
+        return self.masks.coord_of(index)
+
+    @property
+    def legal_mask(self):
+        return self.masks.empty(self.red, self.blue)
+
+    def is_legal(self, hex_coords):
+        row, col = hex_coords.y - 1, hex_coords.x - hex_coords.y // 2 - 1
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return False
+        return bool(self.legal_mask >> self.masks.index(row, col) & 1)
+
+    def legal_moves(self):
+        # A new set each call, as from Board.
+        return {self.coord_of(i) for i in self.masks.iter_bits(self.legal_mask)}
+
+    def _connect(self, hex_coords, turn):
+        bit = 1 << self.index_of(hex_coords)
+        if turn:
+            self.blue |= bit
+        else:
+            self.red |= bit
+
+    def check_result(self):
+        if self.result:
+            return self.result
+
+        masks = self.masks
+        self.result = masks.winner(self.red, self.blue)
+        if self.result == RED_WIN:
+            chain = masks.shortest_chain(self.red, masks.red_edge_1, masks.red_edge_2)
+        elif self.result == BLUE_WIN:
+            chain = masks.shortest_chain(self.blue, masks.blue_edge_1, masks.blue_edge_2)
+        else:
+            chain = 0
+        self.winning_path = {self.coord_of(i) for i in masks.iter_bits(chain)}
+        return self.result
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+
+import collections
+import functools
+import heapq
+import random
+from math import *
+
+Cube = collections.namedtuple("Cube", ["x", "y", "z"])
+Point = collections.namedtuple("Point", ["x", "y"])
+HexAxial = collections.namedtuple("HexAxial", ["q", "r"])
+MapSize = collections.namedtuple("MapSize", ["x_1", "x_2", "y_1", "y_2"])
+MatchLayout = collections.namedtuple("MatchLayout", ["index", "neighbors", "cells", "parent", "edges"])
+
+
+class Coord:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return 'Coord x=%i y=%i' % (self.x, self.y)
+
+    def __eq__(self, other):
+        if not isinstance(other, Coord):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+
+class PriorityQueue:
+    def __init__(self):
+        self._queue = []
+        self._index = 0
+
+    def put(self, item, priority):
+        heapq.heappush(self._queue, (priority, self._index, item))
+        self._index += 1
+
+    def get(self):
+        return heapq.heappop(self._queue)[-1]
+
+    def empty(self):
+        return not self._queue
+
+
+class DisjointSet:
+    def __init__(self):
+        self._parent = dict()
+        self._rank = dict()
+
+    def add(self, item):
+        if item not in self._parent:
+            self._parent[item] = item
+            self._rank[item] = 0
+
+    def find(self, item):
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item_1, item_2):
+        root_1 = self.find(item_1)
+        root_2 = self.find(item_2)
+        if root_1 == root_2:
+            return root_1
+        if self._rank[root_1] < self._rank[root_2]:
+            root_1, root_2 = root_2, root_1
+        self._parent[root_2] = root_1
+        if self._rank[root_1] == self._rank[root_2]:
+            self._rank[root_1] += 1
+        return root_1
+
+    def connected(self, item_1, item_2):
+        return self.find(item_1) == self.find(item_2)
+
+
+class HexTools:
+    def __init__(self, size=None):
+        self._cube_directions = [
+            Cube(+1, -1, 0), Cube(+1, 0, -1), Cube(0, +1, -1),
+            Cube(-1, +1, 0), Cube(-1, 0, +1), Cube(0, -1, +1),
+        ]
+        self.table = get_table(size) if size is not None else None
+
+    @staticmethod
+    def _cube_to_offset(cube):
+        col = cube.x + (cube.z - (cube.z & 1)) / 2
+        row = cube.z
+        return Coord(int(col), int(row))
+
+    @staticmethod
+    def _offset_to_cube(hex_):
+        x = hex_.x - (hex_.y - (int(hex_.y) & 1)) / 2
+        z = hex_.y
+        y = -x - z
+        return Cube(int(x), int(y), int(z))
+
+    def distance(self, object_1, object_2):
+        if self.table is not None:
+            cubes = self.table.cubes
+            a = cubes.get(object_1)
+            b = cubes.get(object_2)
+            if a is not None and b is not None:
+                return (abs(a.x - b.x) + abs(a.y - b.y) + abs(a.z - b.z)) // 2
+        a = self._offset_to_cube(object_1)
+        b = self._offset_to_cube(object_2)
+        return int((abs(a.x - b.x) + abs(a.y - b.y) + abs(a.z - b.z)) / 2)
+
+    @staticmethod
+    def lerp(a, b, t):
+        return a + (b - a) * t
+
+    def cube_lerp(self, a, b, t):
+        _a = self._offset_to_cube(a)
+        _b = self._offset_to_cube(b)
+        return Cube(self.lerp(_a.x, _b.x, t),
+                    self.lerp(_a.y, _b.y, t),
+                    self.lerp(_a.z, _b.z, t))
+
+    @staticmethod
+    def cube_round(cube):
+        return Cube(round(cube.x), round(cube.y), round(cube.z))
+
+    def line_draw(self, a, b):
+        n = self.distance(a, b)
+        results = set()
+        for i in range(n + 1):
+            results.add(self._cube_to_offset(self.cube_round(self.cube_lerp(a, b, 1.0 / n * i))))
+        return results
+
+    @staticmethod
+    def cube_add(cube_1, cube_2):
+        return Cube(x=cube_1.x + cube_2.x, y=cube_1.y + cube_2.y, z=cube_1.z + cube_2.z)
+
+    def get_range(self, center, n):
+        if self.table is not None:
+            ranges = self.table.ranges.get(n)
+            if ranges is not None and center in ranges:
+                return ranges[center]
+        _center = self._offset_to_cube(center)
+        results = set()
+        for x in range(-n, n + 1):
+            for y in range(max(-n, -x - n), min(+n, -x + n) + 1):
+                z = -x - y
+                results.add(self._cube_to_offset(self.cube_add(_center, Cube(x, y, z))))
+        return results
+
+    def cube_neighbor(self, cube, direction):
+        return self.cube_add(cube, self._cube_directions[direction])
+
+    def neighbor(self, offset, direction):
+        if self.table is not None:
+            neighbors = self.table.neighbors.get(offset)
+            if neighbors is not None:
+                return neighbors[direction]
+        cube = self._offset_to_cube(offset)
+        return self._cube_to_offset(self.cube_add(cube, self._cube_directions[direction]))
+
+    def hex_reachable(self, start, movement, blocked):
+        visited = set()  # set of hexes
+        _blocked = set([self._offset_to_cube(b) for b in blocked])
+        _start = self._offset_to_cube(start)
+        visited.add(_start)
+        fringes = list()  # array of arrays of hexes
+        fringes.append([_start])
+
+        for k in range(1, movement + 1):
+            fringes.append([])
+            for cube in fringes[k - 1]:
+                for d in range(6):
+                    neighbor = self.cube_neighbor(cube, d)
+                    if neighbor not in visited and neighbor not in _blocked:
+                        visited.add(neighbor)
+                        fringes[k].append(neighbor)
+
+        return [self._cube_to_offset(v) for v in visited]
+
+    @staticmethod
+    def _checked_hex_the_same(hex_1, hex_2):
+        return hex_1.x == hex_2.x and hex_1.y == hex_2.y
+
+    def heuristic(self, a, b):
+        # Manhattan distance on a square grid
+        return self.distance(a, b)
+
+    def best_way(self, start, goal, area=None):
+        checked = list()
+        frontier = PriorityQueue()
+        frontier.put(start, 0)
+        came_from = dict()
+        came_from[start] = None
+        current = start
+        while not frontier.empty():
+            current = frontier.get()
+            checked.append(current)
+            if current == goal:
+                break
+            for next_ in (self.neighbor(current, i) for i in range(6)):
+                if area and next_ not in area:
+                    continue
+                if next_ not in came_from:
+                    priority = self.heuristic(next_, goal)
+                    came_from[next_] = current
+                    frontier.put(next_, priority)
+        if current != goal:
+            return None
+        path = []
+        while current != start:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return set(path)
+
+    @staticmethod
+    def oddr_offset_to_pixel(hex_, size):
+        x = size * sqrt(3) * (hex_.x + 0.5 * (hex_.y & 1))
+        y = size * 3 / 2 * hex_.y
+        return Point(x, y)
+
+    @staticmethod
+    def axial_to_cube(hex_):
+        x = hex_.q
+        z = hex_.r
+        y = -x - z
+        return Cube(x, y, z)
+
+    @staticmethod
+    def pointy_hex_corner(center, size, i):
+        angle_deg = 60 * i - 30
+        angle_rad = pi / 180 * angle_deg
+        return Point(center.x + size * cos(angle_rad),
+                     center.y + size * sin(angle_rad))
+
+    def hex_round(self, hex_):
+        return self._cube_to_offset(self.cube_round(self.axial_to_cube(hex_)))
+
+    def pixel_to_point_hex(self, point, size):
+        q = (sqrt(3.) / 3. * point.x - 1. / 3. * point.y) / size
+        r = (2. / 3. * point.y) / size
+        return self.hex_round(HexAxial(q, r))
+
+    def get_ring(self, offset, radius):
+        if self.table is not None:
+            rings = self.table.rings.get(radius)
+            if rings is not None and offset in rings:
+                return rings[offset]
+        checked = set()
+        queue = set()
+        queue.add(offset)
+        for r in range(radius):
+            new_queue = set()
+            for el in queue:
+                for i in range(6):
+                    h = self.neighbor(el, i)
+                    if h not in checked:
+                        new_queue.add(h)
+                        checked.add(h)
+            queue = new_queue
+        return queue
+
+
+# Lookup tables for one board size. Results are precomputed for every cell of
+# the playground (boundaries included) and returned as frozensets, so they
+# must not be modified by the caller.
+class HexTable:
+    max_radius = 2
+
+    def __init__(self, size):
+        self.size = size
+        hex_tools = HexTools()
+
+        size_with_boundaries = size + 2
+        self.cells = [Coord(x, y)
+                      for y in range(size_with_boundaries)
+                      for x in range(y // 2, y // 2 + size_with_boundaries)]
+        self.index = {c: i for i, c in enumerate(self.cells)}
+        self.cubes = {c: hex_tools._offset_to_cube(c) for c in self.cells}
+
+        # Neighbours are also kept for a margin around the playground, so
+        # rings of boundary cells never leave the table.
+        self.neighbors = dict()
+        frontier = self.cells
+        for _ in range(self.max_radius):
+            next_frontier = list()
+            for c in frontier:
+                if c not in self.neighbors:
+                    self.neighbors[c] = tuple(hex_tools.neighbor(c, i) for i in range(6))
+                    next_frontier.extend(self.neighbors[c])
+            frontier = next_frontier
+        self.neighbor_indices = [tuple(self.index[n] for n in self.neighbors[c] if n in self.index)
+                                 for c in self.cells]
+
+        self.rings = {r: {c: frozenset(self._ring(c, r)) for c in self.cells}
+                      for r in range(1, self.max_radius + 1)}
+        self.ranges = {r: dict() for r in range(self.max_radius + 1)}
+        for c in self.cells:
+            area = {c}
+            self.ranges[0][c] = frozenset(area)
+            for r in range(1, self.max_radius + 1):
+                area |= self.rings[r][c]
+                self.ranges[r][c] = frozenset(area)
+
+        # Distance-2 partners sharing exactly two neighbours, with those two
+        # cells (the bridge carrier).
+        self.bridges = dict()
+        for c in self.cells:
+            ring_1 = self.rings[1][c]
+            bridges = list()
+            for partner in self.rings[2][c]:
+                if partner == c or partner not in self.index:
+                    continue
+                carrier = ring_1 & self.rings[1][partner]
+                if len(carrier) == 2:
+                    bridges.append((partner, tuple(carrier)))
+            self.bridges[c] = tuple(bridges)
+
+    def _neighbor(self, offset, direction):
+        neighbors = self.neighbors.get(offset)
+        if neighbors is None:
+            return HexTools().neighbor(offset, direction)
+        return neighbors[direction]
+
+    def _ring(self, offset, radius):
+        # Same walk as HexTools.get_ring, over the neighbour table.
+        checked = set()
+        queue = {offset}
+        for r in range(radius):
+            new_queue = set()
+            for el in queue:
+                for i in range(6):
+                    h = self._neighbor(el, i)
+                    if h not in checked:
+                        new_queue.add(h)
+                        checked.add(h)
+            queue = new_queue
+        return queue
+
+    def __len__(self):
+        return len(self.cells)
+
+
+@functools.lru_cache(maxsize=None)
+def get_table(size):
+    return HexTable(size)
+
+
+# Random 64-bit keys for Zobrist hashing, one per colour and HexTable index.
+# The seed is fixed so hashes are stable between processes and runs.
+class ZobristKeys:
+    def __init__(self, size, seed=0):
+        rng = random.Random('zobrist-%i-%i' % (size, seed))
+        cells = len(get_table(size))
+        self.keys = [[rng.getrandbits(64) for _ in range(cells)] for _ in (RED_PLAYER, BLUE_PLAYER)]
+        # XOR into a position hash to tell the side to move apart.
+        self.turn = rng.getrandbits(64)
+
+
+@functools.lru_cache(maxsize=None)
+def get_zobrist(size):
+    return ZobristKeys(size)
+
+
+RED_PLAYER = 0
+BLUE_PLAYER = 1
+RED_WIN = 1
+BLUE_WIN = 2
+PLAYGROUND_SIZE = 11
+# Cell states of Board.cells, indexed like the HexTable of the board size.
+CELL_EMPTY = 0
+CELL_RED = 1
+CELL_BLUE = 2
+CELL_BLOCKED = 3
+# Virtual nodes of the disjoint set standing for the four board edges.
+RED_EDGE_1 = 'red_edge_1'
+RED_EDGE_2 = 'red_edge_2'
+BLUE_EDGE_1 = 'blue_edge_1'
+BLUE_EDGE_2 = 'blue_edge_2'
+
+
+class Board:
+    def __init__(self, size=PLAYGROUND_SIZE):
+        self.size = size
+        self.hex_tools = HexTools(size)
+
+        self.playground = set()
+        self.boundary_blue_1 = set()
+        self.boundary_blue_2 = set()
+        self.boundary_red_1 = set()
+        self.boundary_red_2 = set()
+        self.boundary_corners = set()
+        self.build_playground()
+
+        self.list_of_blue = set()
+        self.list_of_red = set()
+
+        self.table = get_table(size)
+        self.zobrist = get_zobrist(size)
+        self.hash = 0
+        self.cells = bytearray(len(self.table))
+        for region, state in ((self._boundary_red, CELL_RED), (self._boundary_blue, CELL_BLUE),
+                              (self.boundary_corners, CELL_BLOCKED)):
+            for hex_coords in region:
+                self.cells[self.table.index[hex_coords]] = state
+
+        self.connections = DisjointSet()
+        for edge in (RED_EDGE_1, RED_EDGE_2, BLUE_EDGE_1, BLUE_EDGE_2):
+            self.connections.add(edge)
+        self._red_edges = ((self.boundary_red_1, RED_EDGE_1), (self.boundary_red_2, RED_EDGE_2))
+        self._blue_edges = ((self.boundary_blue_1, BLUE_EDGE_1), (self.boundary_blue_2, BLUE_EDGE_2))
+
+        self.result = 0
+        self.winning_path = set()
+
+    @property
+    def boundary_blue(self):
+        return self._boundary_blue
+
+    @property
+    def boundary_red(self):
+        return self._boundary_red
+
+    @property
+    def boundary(self):
+        return self._boundary
+
+    @property
+    def active_area(self):
+        return self._active_area
+
+    @property
+    def all_red(self):
+        return self._all_red
+
+    @property
+    def all_blue(self):
+        return self._all_blue
+
+    def build_playground(self):
+        size_with_boundaries = self.size + 2
+        for y in range(size_with_boundaries):
+            for x in range(y // 2, y // 2 + size_with_boundaries):
+                hex_xy = Coord(x, y)
+                self.playground.add(hex_xy)
+                if y == 0:
+                    self.boundary_red_1.add(hex_xy)
+                if y == size_with_boundaries - 1:
+                    self.boundary_red_2.add(hex_xy)
+                if x == y // 2:
+                    self.boundary_blue_1.add(hex_xy)
+                if x == y // 2 + size_with_boundaries - 1:
+                    self.boundary_blue_2.add(hex_xy)
+
+        self.boundary_corners = (self.boundary_red_1 | self.boundary_red_2) & \
+            (self.boundary_blue_1 | self.boundary_blue_2)
+        self.boundary_red_1 -= self.boundary_corners
+        self.boundary_red_2 -= self.boundary_corners
+        self.boundary_blue_1 -= self.boundary_corners
+        self.boundary_blue_2 -= self.boundary_corners
+
+        # The geometry never changes after this point, so the regions are
+        # frozen once; only the stone-dependent ones are updated in add_hex.
+        self.playground = frozenset(self.playground)
+        self.boundary_red_1 = frozenset(self.boundary_red_1)
+        self.boundary_red_2 = frozenset(self.boundary_red_2)
+        self.boundary_blue_1 = frozenset(self.boundary_blue_1)
+        self.boundary_blue_2 = frozenset(self.boundary_blue_2)
+        self.boundary_corners = frozenset(self.boundary_corners)
+        self._boundary_red = self.boundary_red_1 | self.boundary_red_2
+        self._boundary_blue = self.boundary_blue_1 | self.boundary_blue_2
+        self._boundary = self._boundary_red | self._boundary_blue
+
+        self._active_area = set(self.playground - self._boundary - self.boundary_corners)
+        self._all_red = set(self._boundary_red)
+        self._all_blue = set(self._boundary_blue)
+
+    def is_legal(self, hex_coords):
+        return hex_coords in self.active_area
+
+    def legal_moves(self):
+        # A new set, as from BitBoard: add_hex does not change it under the
+        # caller. active_area is the live one.
+        return set(self._active_area)
+
+    def add_hex(self, hex_coords, turn):
+        index = self.table.index[hex_coords]
+        if turn:
+            self.list_of_blue.add(hex_coords)
+            self._all_blue.add(hex_coords)
+            self.cells[index] = CELL_BLUE
+        else:
+            self.list_of_red.add(hex_coords)
+            self._all_red.add(hex_coords)
+            self.cells[index] = CELL_RED
+        self.hash ^= self.zobrist.keys[int(turn)][index]
+        self._active_area.discard(hex_coords)
+        self._connect(hex_coords, turn)
+
+    def _connect(self, hex_coords, turn):
+        if turn:
+            stones, edges = self.list_of_blue, self._blue_edges
+        else:
+            stones, edges = self.list_of_red, self._red_edges
+        connections = self.connections
+        connections.add(hex_coords)
+        for i in range(6):
+            neighbor = self.hex_tools.neighbor(hex_coords, i)
+            if neighbor in stones:
+                connections.union(hex_coords, neighbor)
+            else:
+                for boundary, edge in edges:
+                    if neighbor in boundary:
+                        connections.union(hex_coords, edge)
+
+    def check_result(self):
+        if self.result:
+            return self.result
+
+        if self.connections.connected(RED_EDGE_1, RED_EDGE_2):
+            self.result = RED_WIN
+            self.winning_path = self._find_way(self.boundary_red_1, self.boundary_red_2, self.all_red)
+            self.winning_path -= self.boundary_red
+        elif self.connections.connected(BLUE_EDGE_1, BLUE_EDGE_2):
+            self.result = BLUE_WIN
+            self.winning_path = self._find_way(self.boundary_blue_1, self.boundary_blue_2, self.all_blue)
+            self.winning_path -= self.boundary_blue
+        return self.result
+
+    def _find_way(self, boundary_1, boundary_2, area):
+        # The connection is already known, so the path search runs once per game.
+        return self.hex_tools.best_way(next(iter(boundary_1)), next(iter(boundary_2)), area=area)
+
+
+# Board of one server match: cell states and a disjoint set over HexTable
+# indices, copied from a per-size template where the boundary cells of
+# every edge are already joined. A move is a few list operations and the
+# result is known as soon as it is made, so thousands of matches can be
+# judged on one event loop.
+class MatchBoard:
+    def __init__(self, size=PLAYGROUND_SIZE):
+        layout = get_match_layout(size)
+        self.size = size
+        self.index = layout.index
+        self.neighbors = layout.neighbors
+        self.edges = layout.edges
+        self.cells = bytearray(layout.cells)
+        self.parent = list(layout.parent)
+        self.turn = RED_PLAYER
+        self.result = 0
+
+    def is_legal(self, hex_coords):
+        index = self.index.get(hex_coords)
+        return index is not None and self.cells[index] == CELL_EMPTY
+
+    def play(self, hex_coords, turn):
+        # Returns False, changing nothing, for a move out of turn, on a
+        # taken or unknown cell, or after the game is over.
+        if self.result or turn != self.turn or not self.is_legal(hex_coords):
+            return False
+        index = self.index[hex_coords]
+        state = CELL_BLUE if turn else CELL_RED
+        cells = self.cells
+        cells[index] = state
+        for neighbor in self.neighbors[index]:
+            if cells[neighbor] == state:
+                self.parent[self._find(neighbor)] = self._find(index)
+        edge_1, edge_2 = self.edges[turn]
+        if self._find(edge_1) == self._find(edge_2):
+            self.result = BLUE_WIN if turn else RED_WIN
+        self.turn = RED_PLAYER if turn else BLUE_PLAYER
+        return True
+
+    def _find(self, index):
+        parent = self.parent
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+
+@functools.lru_cache(maxsize=None)
+def get_match_layout(size):
+    board = Board(size)
+    table = board.table
+    parent = list(range(len(table)))
+    edges = list()
+    for boundaries in ((board.boundary_red_1, board.boundary_red_2),
+                       (board.boundary_blue_1, board.boundary_blue_2)):
+        roots = list()
+        for boundary in boundaries:
+            indices = [table.index[c] for c in boundary]
+            for i in indices:
+                parent[i] = indices[0]
+            roots.append(indices[0])
+        edges.append(tuple(roots))
+    return MatchLayout(table.index, table.neighbor_indices, bytes(board.cells), tuple(parent), tuple(edges))
+
+
+class HintsFinder:
+    def __init__(self, size=None):
+        self.hex_tools = HexTools(size)
+
+    def find_road_hints(self, list_, active_area):
+        hints = list()
+        for h_1 in list_:
+            for h_2 in (self.hex_tools.get_ring(h_1, 2) & list_):
+                if h_2 == h_1:
+                    continue
+                between = (self.hex_tools.get_ring(h_1, 1) & self.hex_tools.get_ring(h_2, 1)) & active_area
+                if len(between) == 2:
+                    hints.append(between)
+        return hints
+
+    def find_all_hints(self, list_, active_area):
+        hints_road = self.find_road_hints(list_, active_area)
+        hints = set()
+        for pair in hints_road:
+            hints.update(pair)
+        return hints
+
+
+# Keeps the bridges (two stones of one colour with both shared neighbours
+# empty) up to date move by move, instead of rescanning every stone.
+class HintIndex:
+    def __init__(self, board):
+        self.board = board
+        self.table = get_table(board.size)
+        self.hints = {RED_PLAYER: set(), BLUE_PLAYER: set()}
+        self._bridges = {RED_PLAYER: dict(), BLUE_PLAYER: dict()}
+        self._carrier_count = {RED_PLAYER: collections.Counter(), BLUE_PLAYER: collections.Counter()}
+        self._by_carrier = collections.defaultdict(set)
+
+        for turn, stones in ((RED_PLAYER, board.list_of_red), (BLUE_PLAYER, board.list_of_blue)):
+            for hex_coords in stones:
+                self._add_bridges(hex_coords, turn, set())
+
+    def add_hex(self, hex_coords, turn):
+        # Must be called after the stone is placed on the board. Returns the
+        # cells whose hint state changed.
+        changed = {hex_coords}
+        for colour, key in list(self._by_carrier.pop(hex_coords, ())):
+            self._remove_bridge(colour, key, changed)
+        self._add_bridges(hex_coords, turn, changed)
+        return changed
+
+    def _add_bridges(self, hex_coords, turn, changed):
+        stones = self.board.list_of_blue if turn else self.board.list_of_red
+        active_area = self.board.active_area
+        for partner, carrier in self.table.bridges[hex_coords]:
+            if partner not in stones or carrier[0] not in active_area or carrier[1] not in active_area:
+                continue
+            key = frozenset((hex_coords, partner))
+            if key in self._bridges[turn]:
+                continue
+            self._bridges[turn][key] = carrier
+            for cell in carrier:
+                self._by_carrier[cell].add((turn, key))
+                self._carrier_count[turn][cell] += 1
+                if cell not in self.hints[turn]:
+                    self.hints[turn].add(cell)
+                    changed.add(cell)
+
+    def _remove_bridge(self, turn, key, changed):
+        for cell in self._bridges[turn].pop(key):
+            self._by_carrier[cell].discard((turn, key))
+            self._carrier_count[turn][cell] -= 1
+            if not self._carrier_count[turn][cell]:
+                del self._carrier_count[turn][cell]
+                self.hints[turn].discard(cell)
+                changed.add(cell)
@@ -2,13 +2,13 @@
 
 import game
 from game import Game, Coord
+import collections
 import socket
 import selectors
 import types
 import server
 import multiprocessing
-
-BUFFER_SIZE = server.BUFFER_SIZE
+from protocol import FrameReader, FrameWriter, RECEIVE_SIZE
 
 
 class ClientController:
@@ -23,25 +23,24 @@ class ClientController:
         self._connected = False
         self._opponent_exist = False
         self._receive_data = False
+        # Every stone shown, in order, so a rejected one can be taken back.
+        self._moves = list()
 
     def click_hex(self, hex_object):
         if self.result or not self._opponent_exist:
             return
 
         if self.turn == self.side:
+            # The server judges the move and announces the result.
             self.game_view.add_hex(hex_object, self.turn)
-            self.result = self.game_view.check_result()
+            self._moves.append((hex_object, self.turn))
             self.client_connection.send_move(hex_object)
-            if self.result:
-                self._set_to_game_over()
-            else:
-                self._set_turn()
+            self._watch()
+            self._set_turn()
 
             if self.hints:
                 self.game_view.draw_hints()
 
-        self._get_opponent_move()
-
     def _set_to_game_over(self):
         if self.result == self.side + 1:
             self.game_view.draw_comment(u"You win! Well done.")
@@ -59,45 +58,90 @@ class ClientController:
         if move:
             hex_object = Coord(x=move[0], y=move[1])
             self.game_view.add_hex(hex_object, not self.side)
-            self.game_view.check_result()
+            self._moves.append((hex_object, not self.side))
             self._set_turn()
 
-    def update(self):
-        if self.result:
+    def _undo_move(self, move):
+        # The stone was shown before the server judged it: the board is
+        # replayed without it and the turn comes back to this player.
+        hex_object = Coord(x=move[0], y=move[1])
+        for i in reversed(range(len(self._moves))):
+            if self._moves[i] == (hex_object, self.side):
+                del self._moves[i]
+                break
+        else:
             return
+        self.game_view.replay(self._moves)
+        self.turn = self.side
+        self.game_view.draw_turn(self.turn)
+        if self.hints:
+            self.game_view.draw_hints()
 
+    def update(self):
+        # Only connects; everything from the server arrives through
+        # _on_network, called by the Tk loop when the socket is ready.
         if not self._connected:
             self.game_view.draw_comment(u'Not connected')
             self._connected = self.connect()
+            if self._connected:
+                self._watch()
+
+    def _watch(self):
+        connection = self.client_connection
+        if connection.data.closed:
+            self.game_view.unwatch(connection.socket)
         else:
-            if not self._receive_data:
-                self.side = self.client_connection.receive_side()
-                self.game_view.draw_side(self.side)
-                self.turn = self.client_connection.receive_turn()
-                self._receive_data = True
-            if self._receive_data and not self._start:
-                self._opponent_exist = self.client_connection.check_opponent()
-                if self._opponent_exist:
-                    self.game_view.draw_turn(self.turn)
-                    self._start = True
-
-            if not self._start:
-                self.game_view.draw_comment(u'Waiting.')
-            else:
-                self._opponent_exist = self.client_connection.check_opponent()
-                if not self._opponent_exist:
-                    self.game_view.draw_comment(u'Opponent has gone.')
-                    self.game_view.clear_turn()
-                    return
-                self.game_view.draw_comment(['Opponent move', 'Your move'][self.turn == self.side])
-
-        if self._start:
-            if self.turn != self.side:
-                self._get_opponent_move()
-
-            self.result = self.game_view.check_result()
-            if self.result:
-                self._set_to_game_over()
+            self.game_view.watch(connection.socket, self._on_network, writable=bool(connection.outbound))
+
+    def _on_network(self):
+        self.client_connection.service()
+        self._refresh()
+        self._watch()
+
+    def _refresh(self):
+        if self.result:
+            return
+
+        data = self.client_connection.data
+        if not self._receive_data:
+            if data.size is None or data.side is None or data.turn is None:
+                return
+            self.game_view.resize(data.size)
+            self.side = data.side
+            self.game_view.draw_side(self.side)
+            self.turn = data.turn
+            self._receive_data = True
+        if not self._start:
+            self._opponent_exist = self.client_connection.check_opponent()
+            if self._opponent_exist:
+                self.game_view.draw_turn(self.turn)
+                self._start = True
+
+        if not self._start:
+            self.game_view.draw_comment(u'Waiting.')
+            return
+
+        rejected = bool(data.rejected)
+        while data.rejected:
+            self._undo_move(data.rejected.popleft())
+        while self.turn != self.side and data.moves:
+            self._get_opponent_move()
+        if data.result:
+            self.result = data.result
+            # Only draws the winning path; the result itself is the server's.
+            self.game_view.check_result()
+            self._set_to_game_over()
+            return
+        if rejected:
+            self.game_view.draw_comment(u'Move rejected by the server.')
+            return
+
+        self._opponent_exist = self.client_connection.check_opponent()
+        if not self._opponent_exist:
+            self.game_view.draw_comment(u'Opponent has gone.')
+            self.game_view.clear_turn()
+            return
+        self.game_view.draw_comment(['Opponent move', 'Your move'][self.turn == self.side])
 
     def run_game(self, number=None):
         if number:
@@ -115,14 +159,17 @@ class Client:
         self.socket = None
         self.selector = selectors.DefaultSelector()
         self.data = types.SimpleNamespace(
+            size=None,
             side=None,
             turn=None,
-            move=None,
-            opponent=False
-        )
-        self.to_send = types.SimpleNamespace(
-            move=None
+            moves=collections.deque(),
+            opponent=False,
+            result=0,
+            rejected=collections.deque(),
+            closed=False
         )
+        self.frames = FrameReader()
+        self.outbound = FrameWriter()
 
     def connect(self):
         server_address = (server.HOST, server.PORT)
@@ -130,15 +177,15 @@ class Client:
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setblocking(False)
         self.socket.connect_ex(server_address)
-        events = selectors.EVENT_READ | selectors.EVENT_WRITE
-        self.selector.register(self.socket, events, data=None)
+        # Write interest is added by send_move only while a move is pending.
+        self.selector.register(self.socket, selectors.EVENT_READ, data=None)
         return 1
 
-    def service(self):
+    def service(self, timeout=0):
         try:
-            events = self.selector.select(timeout=1)
+            events = self.selector.select(timeout=timeout)
             for key, mask in events:
-                return self.service_connection(key, mask)
+                self.service_connection(key, mask)
         except KeyboardInterrupt:
             print('CLIENT %i: Caught keyboard interrupt, exiting' % self.number)
             self.selector.close()
@@ -147,43 +194,67 @@ class Client:
         connection = key.fileobj
 
         if mask & selectors.EVENT_READ:
-            status, command = server.receive(connection)
-            if status:
+            try:
+                received = connection.recv(RECEIVE_SIZE)
+            except BlockingIOError:
+                received = None
+            except ConnectionError:
+                received = b''
+            if received == b'':
+                # The server has gone; stop polling a closed socket.
+                self.selector.unregister(connection)
+                self.data.closed = True
+                return
+            if received:
+                self.frames.feed(received)
+            while self.frames.commands:
+                command = self.frames.commands.popleft()
+                if command.head == 'b':
+                    self.data.size = command.values[0]
+                    print('CLIENT %i: Receive board size ' % self.number, self.data.size)
                 if command.head == 's':
-                    self.data.side = command.values[1]
+                    self.data.side = command.values[0]
                     print('CLIENT %i: Receive side ' % self.number, self.data.side)
                 if command.head == 't':
-                    self.data.turn = command.values[1]
+                    self.data.turn = command.values[0]
                     print('CLIENT %i: Receive turn ' % self.number, self.data.turn)
                 if command.head == 'o':
-                    self.data.opponent = command.values[1]
+                    self.data.opponent = command.values[0]
                     print('CLIENT %i: Receive opponent ' % self.number, self.data.opponent)
                 if command.head == 'm':
-                    self.data.move = command.values
-                    print('CLIENT %i: Receive move ' % self.number, self.data.move)
-
-        if mask & selectors.EVENT_WRITE:
-            if self.to_send.move is not None:
-                server.send(connection, 'm', self.to_send.move)
-                print('CLIENT %i: Send move ' % self.number, self.to_send.move)
-                self.to_send.move = None
+                    # Several moves may arrive in one read; none is dropped.
+                    self.data.moves.append(command.values)
+                    print('CLIENT %i: Receive move ' % self.number, command.values)
+                if command.head == 'r':
+                    self.data.rejected.append(command.values)
+                    print('CLIENT %i: Move rejected ' % self.number, command.values)
+                if command.head == 'w':
+                    self.data.result = command.values[0]
+                    print('CLIENT %i: Receive result ' % self.number, self.data.result)
+
+        if mask & selectors.EVENT_WRITE and self.outbound:
+            if self.outbound.flush(connection):
+                self.selector.modify(connection, selectors.EVENT_READ)
+
+    def receive_size(self):
+        while self.data.size is None:
+            self.service(timeout=1)
+        return self.data.size
 
     def receive_side(self):
         while self.data.side is None:
-            self.service()
+            self.service(timeout=1)
         return self.data.side
 
     def receive_turn(self):
         while self.data.turn is None:
-            self.service()
+            self.service(timeout=1)
         return self.data.turn
 
     def receive_move(self):
         self.service()
-        if self.data.move is not None:
-            m = self.data.move
-            self.data.move = None
-            return m
+        if self.data.moves:
+            return self.data.moves.popleft()
         else:
             return ()
 
@@ -192,9 +263,15 @@ class Client:
         return self.data.opponent
 
     def send_move(self, hex_coords):
-        self.to_send.move = (hex_coords.x, hex_coords.y)
-        while self.to_send.move is not None:
-            self.service()
+        move = hex_coords.x, hex_coords.y
+        if self.data.closed:
+            return
+        # Whatever the socket does not take now is sent by service() once
+        # it is writable, so the caller never waits.
+        self.outbound.queue('m', move)
+        if not self.outbound.flush(self.socket):
+            self.selector.modify(self.socket, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        print('CLIENT %i: Send move ' % self.number, move)
 
 
 def run_new_client(number):
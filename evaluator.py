@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import collections
+import functools
+from board import (get_table, Board, RED_PLAYER, BLUE_PLAYER,
+                   CELL_EMPTY, CELL_RED, CELL_BLUE, CELL_BLOCKED)
+
+UNREACHABLE = 1 << 30
+
+Evaluation = collections.namedtuple("Evaluation", ["red", "blue", "red_maps", "blue_maps"])
+
+
+# "Distance to connect": the number of empty cells a side still has to fill
+# to join its two edges, found with a 0-1 BFS over the board. Own stones cost
+# 0, empty cells 1 and opponent stones are blocked. Distance maps are lists
+# indexed like the HexTable of the board size; a cell's value includes its
+# own cost.
+class Evaluator:
+    def __init__(self, size):
+        self.size = size
+        self.table = get_table(size)
+        geometry = Board(size)
+        index = self.table.index
+        self.edges = {
+            RED_PLAYER: ([index[c] for c in geometry.boundary_red_1],
+                         [index[c] for c in geometry.boundary_red_2]),
+            BLUE_PLAYER: ([index[c] for c in geometry.boundary_blue_1],
+                          [index[c] for c in geometry.boundary_blue_2]),
+        }
+        self.costs = dict()
+        for side, own in ((RED_PLAYER, CELL_RED), (BLUE_PLAYER, CELL_BLUE)):
+            cost = [UNREACHABLE] * (CELL_BLOCKED + 1)
+            cost[CELL_EMPTY] = 1
+            cost[own] = 0
+            self.costs[side] = cost
+
+    def distance_map(self, cells, side, edge):
+        cost = self.costs[side]
+        neighbors = self.table.neighbor_indices
+        dist = [UNREACHABLE] * len(cells)
+        queue = collections.deque()
+        for i in self.edges[side][edge]:
+            dist[i] = 0
+            queue.append(i)
+
+        while queue:
+            current = queue.popleft()
+            d = dist[current]
+            for n in neighbors[current]:
+                c = cost[cells[n]]
+                if c == UNREACHABLE:
+                    continue
+                nd = d + c
+                if nd < dist[n]:
+                    dist[n] = nd
+                    if c:
+                        queue.append(n)
+                    else:
+                        queue.appendleft(n)
+        return dist
+
+    def distance(self, cells, side):
+        # Same search as distance_map, stopping as soon as the far edge is
+        # taken off the queue.
+        cost = self.costs[side]
+        neighbors = self.table.neighbor_indices
+        source, target = self.edges[side]
+        target = set(target)
+        dist = [UNREACHABLE] * len(cells)
+        done = bytearray(len(cells))
+        queue = collections.deque()
+        for i in source:
+            dist[i] = 0
+            queue.append(i)
+
+        while queue:
+            current = queue.popleft()
+            if done[current]:
+                continue
+            done[current] = 1
+            d = dist[current]
+            if current in target:
+                return d
+            for n in neighbors[current]:
+                c = cost[cells[n]]
+                if c == UNREACHABLE:
+                    continue
+                nd = d + c
+                if nd < dist[n]:
+                    dist[n] = nd
+                    if c:
+                        queue.append(n)
+                    else:
+                        queue.appendleft(n)
+        return UNREACHABLE
+
+    def through_map(self, cells, side, maps):
+        # Fewest empty cells of a connection forced through each cell.
+        cost = self.costs[side]
+        from_1, from_2 = maps
+        return [UNREACHABLE if from_1[i] >= UNREACHABLE or from_2[i] >= UNREACHABLE
+                else from_1[i] + from_2[i] - cost[cells[i]]
+                for i in range(len(cells))]
+
+    def evaluate(self, board):
+        cells = board.cells
+        red_maps = self.distance_map(cells, RED_PLAYER, 0), self.distance_map(cells, RED_PLAYER, 1)
+        blue_maps = self.distance_map(cells, BLUE_PLAYER, 0), self.distance_map(cells, BLUE_PLAYER, 1)
+        red = min(red_maps[0][i] for i in self.edges[RED_PLAYER][1])
+        blue = min(blue_maps[0][i] for i in self.edges[BLUE_PLAYER][1])
+        return Evaluation(red, blue, red_maps, blue_maps)
+
+    def distances(self, board):
+        return self.distance(board.cells, RED_PLAYER), self.distance(board.cells, BLUE_PLAYER)
+
+
+@functools.lru_cache(maxsize=None)
+def get_evaluator(size):
+    return Evaluator(size)
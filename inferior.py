@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import collections
+import functools
+from board import get_table, RED_PLAYER, BLUE_PLAYER, CELL_EMPTY, CELL_RED, CELL_BLUE
+
+Inferior = collections.namedtuple("Inferior", ["dead", "captured", "dominated", "moves"])
+
+STONES = {RED_PLAYER: CELL_RED, BLUE_PLAYER: CELL_BLUE}
+
+
+def _useless(states, own):
+    # A stone of `own` on the centre only joins its neighbours to each other,
+    # so it is useless when every two neighbours it could join are already
+    # joined around the ring through own stones (or are adjacent).
+    usable = [i for i in range(6) if states[i] in (CELL_EMPTY, own)]
+    for a in usable:
+        for b in usable:
+            if a >= b:
+                continue
+            if not (all(states[i] == own for i in range(a + 1, b)) or
+                    all(states[i % 6] == own for i in range(b + 1, a + 6))):
+                return False
+    return True
+
+
+# Every cell state of the six neighbours, in HexTools direction order (which
+# runs around the ring), packed two bits each into a code of 4 ** 6 entries.
+# dead[code] is set when the colour of the centre can not change the winner:
+# since a full Hex board has exactly one winner, a cell useless to either side
+# is dead.
+class PatternTable:
+    def __init__(self):
+        self.dead = bytearray(4 ** 6)
+        for code in range(4 ** 6):
+            states = [code >> 2 * i & 3 for i in range(6)]
+            self.dead[code] = _useless(states, CELL_RED) or _useless(states, CELL_BLUE)
+
+    @staticmethod
+    def code(cells, ring):
+        return (cells[ring[0]] | cells[ring[1]] << 2 | cells[ring[2]] << 4 |
+                cells[ring[3]] << 6 | cells[ring[4]] << 8 | cells[ring[5]] << 10)
+
+
+@functools.lru_cache(maxsize=None)
+def get_patterns():
+    return PatternTable()
+
+
+# Inferior cell analysis on Board.cells:
+#  - dead cells, whose colour never matters;
+#  - captured pairs: two adjacent empty cells where a stone of one side on
+#    either kills the other, so that side can always answer inside the pair
+#    and both may be filled with its stones;
+#  - dominated cells of the side to move: a cell c is killed by the mover's
+#    own stone on an empty neighbour d, so playing d is at least as good.
+# Dead and captured cells are filled in and the search repeated, as every
+# fill-in can complete new patterns around it.
+class InferiorCells:
+    def __init__(self, size):
+        self.size = size
+        self.table = get_table(size)
+        self.patterns = get_patterns()
+        self.rings = {i: self.table.neighbor_indices[i] for i in range(len(self.table))
+                      if len(self.table.neighbor_indices[i]) == 6}
+
+    def analyse(self, cells, turn):
+        cells = bytearray(cells)
+        rings = self.rings
+        dead_table = self.patterns.dead
+        code = self.patterns.code
+        empty = {i for i in rings if cells[i] == CELL_EMPTY}
+        dead = set()
+        captured = {RED_PLAYER: set(), BLUE_PLAYER: set()}
+
+        changed = True
+        while changed:
+            changed = False
+            for i in sorted(empty):
+                if dead_table[code(cells, rings[i])]:
+                    # Either colour is fine for a dead cell.
+                    cells[i] = CELL_RED
+                    empty.discard(i)
+                    dead.add(i)
+                    changed = True
+            for side, stone in STONES.items():
+                for i in sorted(empty):
+                    if i not in empty:
+                        continue
+                    for n in rings[i]:
+                        if n not in empty or n < i:
+                            continue
+                        if self._kills(cells, n, i, stone) and self._kills(cells, i, n, stone):
+                            cells[i] = cells[n] = stone
+                            empty -= {i, n}
+                            captured[side] |= {i, n}
+                            changed = True
+                            break
+
+        stone = STONES[turn]
+        killers = {i: [n for n in rings[i] if n in empty and self._kills(cells, n, i, stone)]
+                   for i in empty}
+        # Only a cell that is not dominated itself may stand in for another,
+        # so two cells killing each other both stay.
+        dominated = {i for i in empty if any(not killers[n] for n in killers[i])}
+        moves = empty - dominated
+        return dead, captured, dominated, moves
+
+    def _kills(self, cells, stone_at, cell, stone):
+        # True when `stone` on stone_at makes cell dead.
+        saved = cells[stone_at]
+        cells[stone_at] = stone
+        killed = self.patterns.dead[self.patterns.code(cells, self.rings[cell])]
+        cells[stone_at] = saved
+        return killed
+
+    def analyse_board(self, board, turn):
+        cell_of = self.table.cells
+        dead, captured, dominated, moves = self.analyse(board.cells, turn)
+        return Inferior({cell_of[i] for i in dead},
+                        {side: {cell_of[i] for i in cells} for side, cells in captured.items()},
+                        {cell_of[i] for i in dominated},
+                        {cell_of[i] for i in moves})
+
+    def reduced_moves(self, board, turn):
+        # Legal moves worth searching; when every empty cell is inferior the
+        # game is already decided and any legal move will do.
+        moves = self.analyse_board(board, turn).moves
+        return moves or board.legal_moves()
+
+
+@functools.lru_cache(maxsize=None)
+def get_inferior(size):
+    return InferiorCells(size)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+import asyncio
+import random
+import resource
+import sys
+import time
+import types
+import board
+import server
+from board import Board, Coord
+from protocol import FrameReader, encode, read_command
+
+CONNECTIONS = 1000
+MOVE_RATE = 1.
+SECONDS = 20.
+FILE_LIMIT = 65536
+
+
+def raise_file_limit(limit=FILE_LIMIT):
+    # Raises the soft limit towards the hard one, capped: an unlimited hard
+    # limit is not accepted as a soft one everywhere (macOS). Returns the
+    # soft limit in effect.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = limit if hard == resource.RLIM_INFINITY else min(hard, limit)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return sys.maxsize if soft == resource.RLIM_INFINITY else soft
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+# Headless players for any of the servers, all in one process. Players are
+# connected two at a time, so the server pairs them with each other, and
+# each pair plays legal moves on a shared Board at `rate` moves per second.
+# A finished game is closed and a new pair connects in its place. The relay
+# latency of a move is from just before its send() to its arrival at the
+# opponent. Moves come from `script` while it has legal ones, then at random.
+class LoadGenerator:
+    def __init__(self, host=None, port=None, connections=CONNECTIONS, rate=MOVE_RATE, seconds=SECONDS,
+                 script=(), seed=None):
+        self.host = server.HOST if host is None else host
+        self.port = server.PORT if port is None else port
+        self.games = max(1, connections // 2)
+        self.interval = 1. / rate
+        self.seconds = seconds
+        self.script = [Coord(x, y) for x, y in script]
+        self.random = random.Random(seed)
+        self.latencies = list()
+        self.connect_times = list()
+        self.finished = 0
+        # Made in run(): before Python 3.10 a Lock binds to the loop
+        # current at creation.
+        self._pairing = None
+        self._stop = 0.
+
+    async def _player(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        player = types.SimpleNamespace(reader=reader, writer=writer, frames=FrameReader())
+        setup = {}
+        while len(setup) < 3:
+            command = await read_command(reader, player.frames)
+            if command is None:
+                raise ConnectionError('server closed the connection')
+            setup[command.head] = command.values[0]
+        player.size, player.side = setup['b'], setup['s']
+        return player
+
+    async def _opponent_found(self, player):
+        command = await read_command(player.reader, player.frames)
+        if command is None or command.head != 'o' or not command.values[0]:
+            raise ConnectionError('player was not paired')
+
+    async def pair(self):
+        async with self._pairing:
+            start = time.perf_counter()
+            first = await self._player()
+            second = await self._player()
+            await asyncio.gather(self._opponent_found(first), self._opponent_found(second))
+            self.connect_times.append(time.perf_counter() - start)
+        red, blue = (first, second) if first.side == board.RED_PLAYER else (second, first)
+        moves = list(Board(red.size).active_area)
+        self.random.shuffle(moves)
+        return types.SimpleNamespace(board=Board(red.size), turn=board.RED_PLAYER, players=(red, blue),
+                                     script=list(reversed(self.script)), moves=moves, sent=None)
+
+    def _next_move(self, match):
+        for moves in (match.script, match.moves):
+            while moves:
+                move = moves.pop()
+                if match.board.is_legal(move):
+                    return move
+        return None
+
+    async def _play(self, match, side):
+        # Returns once its player has to move in a finished game or after
+        # the run; its opponent is then left waiting and cancelled.
+        # The wait for the next move comes before it, so the player is back
+        # reading by the time its opponent answers.
+        player = match.players[side]
+        delay = self.random.uniform(0, self.interval) if side == board.RED_PLAYER else self.interval
+        while True:
+            if match.turn == side:
+                await asyncio.sleep(min(delay, max(0., self._stop - time.perf_counter())))
+                delay = self.interval
+                move = self._next_move(match)
+                if move is None or match.board.check_result() or time.perf_counter() >= self._stop:
+                    return
+                match.board.add_hex(move, side)
+                match.turn = not side
+                match.sent = time.perf_counter()
+                player.writer.write(encode('m', (move.x, move.y)))
+                await player.writer.drain()
+            else:
+                command = await read_command(player.reader, player.frames)
+                if command is None:
+                    return
+                if command.head == 'm':
+                    self.latencies.append(time.perf_counter() - match.sent)
+
+    async def _game_slot(self, match):
+        while True:
+            players = [asyncio.create_task(self._play(match, side))
+                       for side in (board.RED_PLAYER, board.BLUE_PLAYER)]
+            try:
+                await asyncio.wait(players, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in players:
+                    task.cancel()
+                for player in match.players:
+                    player.writer.close()
+            if match.board.check_result():
+                self.finished += 1
+            if time.perf_counter() >= self._stop:
+                return
+            match = await self.pair()
+
+    async def run(self):
+        self._pairing = asyncio.Lock()
+        self._stop = float('inf')
+        connect_start = time.perf_counter()
+        matches = [await self.pair() for _ in range(self.games)]
+        connect_time = time.perf_counter() - connect_start
+        print('%i connections paired in %.2f s (%.0f connections/s)'
+              % (2 * self.games, connect_time, 2 * self.games / connect_time))
+
+        self.connect_times.clear()
+        self._stop = time.perf_counter() + self.seconds
+        start = time.perf_counter()
+        await asyncio.gather(*[self._game_slot(match) for match in matches])
+        self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+        print('%i moves relayed in %.1f s (%.0f moves/s), %i games finished'
+              % (len(latencies), elapsed, len(latencies) / elapsed, self.finished))
+        if self.connect_times:
+            print('%i pairs reconnected, %.0f connections/s' % (len(self.connect_times),
+                                                               2 * len(self.connect_times) / sum(self.connect_times)))
+        if latencies:
+            print('relay latency p50 %.2f ms, p95 %.2f ms, p99 %.2f ms, max %.2f ms'
+                  % tuple(v * 1e3 for v in (percentile(latencies, .5), percentile(latencies, .95),
+                                            percentile(latencies, .99), latencies[-1])))
+
+
+if __name__ == '__main__':
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else CONNECTIONS
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else MOVE_RATE
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else SECONDS
+    port = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    limit = raise_file_limit()
+    if connections + 100 > limit:
+        print('open file limit %i is too low for %i connections' % (limit, connections))
+        sys.exit(1)
+    asyncio.run(LoadGenerator(port=port, connections=connections, rate=rate, seconds=seconds).run())
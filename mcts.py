@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import collections
+import concurrent.futures
+import math
+import os
+import random
+import time
+from bitboard import get_masks
+from board import RED_PLAYER, BLUE_PLAYER, RED_WIN, PLAYGROUND_SIZE
+from game import Game, SimpleController
+from inferior import get_inferior
+
+SearchStats = collections.namedtuple("SearchStats", ["playouts", "seconds", "playouts_per_second"])
+
+
+class Node:
+    def __init__(self, move, parent, turn, moves):
+        self.move = move
+        self.parent = parent
+        # Side to move in this node; the stone of `move` belongs to the other.
+        self.turn = turn
+        self.untried = moves
+        self.children = list()
+        self.wins = 0
+        self.visits = 0
+
+    def select_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda c: c.wins / c.visits + exploration * math.sqrt(log_visits / c.visits))
+
+
+class TreeSearch:
+    def __init__(self, size, exploration=1.0, seed=None):
+        self.masks = get_masks(size)
+        self.exploration = exploration
+        self.random = random.Random(seed)
+
+    def playout(self, red, blue, turn):
+        # A filled Hex board always has exactly one winner, so the remaining
+        # cells are split at random between both sides and scored once.
+        empty = list(self.masks.iter_bits(self.masks.empty(red, blue)))
+        self.random.shuffle(empty)
+        own = 0
+        for i in empty[::2]:
+            own |= 1 << i
+        other = self.masks.empty(red, blue) & ~own
+        if turn == RED_PLAYER:
+            red, blue = red | own, blue | other
+        else:
+            red, blue = red | other, blue | own
+        return RED_PLAYER if self.masks.winner(red, blue) == RED_WIN else BLUE_PLAYER
+
+    def run(self, red, blue, turn, seconds=None, playouts=None, moves=None):
+        # `moves` restricts the root to a pruned list of bit indices.
+        if moves is None:
+            moves = self.masks.iter_bits(self.masks.empty(red, blue))
+        root = Node(None, None, turn, list(moves))
+        deadline = time.perf_counter() + seconds if seconds is not None else None
+        count = 0
+        while (playouts is None or count < playouts) and (deadline is None or time.perf_counter() < deadline):
+            node, node_red, node_blue = root, red, blue
+            while not node.untried and node.children:
+                node = node.select_child(self.exploration)
+                if node.turn == RED_PLAYER:
+                    node_blue |= 1 << node.move
+                else:
+                    node_red |= 1 << node.move
+
+            if node.untried:
+                move = node.untried.pop(self.random.randrange(len(node.untried)))
+                if node.turn == RED_PLAYER:
+                    node_red |= 1 << move
+                else:
+                    node_blue |= 1 << move
+                moves = list(self.masks.iter_bits(self.masks.empty(node_red, node_blue)))
+                child = Node(move, node, not node.turn, moves)
+                node.children.append(child)
+                node = child
+
+            winner = self.playout(node_red, node_blue, node.turn)
+            while node is not None:
+                node.visits += 1
+                if winner != node.turn:
+                    node.wins += 1
+                node = node.parent
+            count += 1
+        return {c.move: (c.visits, c.wins) for c in root.children}, count
+
+
+def _search_worker(size, red, blue, turn, seconds, playouts, seed, moves=None):
+    return TreeSearch(size, seed=seed).run(red, blue, turn, seconds, playouts, moves)
+
+
+# Root-parallel MCTS: every worker grows its own tree from the same position
+# and the root visit counts are summed to pick the move.
+class MCTSPlayer:
+    def __init__(self, size=PLAYGROUND_SIZE, seconds=1.0, playouts=None, workers=None, prune=True):
+        if seconds is None and playouts is None:
+            raise ValueError('a search needs seconds, playouts or both')
+        self.size = size
+        self.masks = get_masks(size)
+        # Dead, captured and dominated cells are left out at the root.
+        self.inferior = get_inferior(size) if prune else None
+        self.seconds = seconds
+        self.playouts = playouts
+        self.workers = workers or os.cpu_count() or 1
+        self.last_stats = None
+        self._pool = None
+        self._seed = random.Random()
+
+    def search(self, board, turn):
+        red, blue = self.masks.encode(board)
+        moves = None
+        if self.inferior is not None:
+            moves = sorted(self.masks.index_of(c) for c in self.inferior.reduced_moves(board, turn))
+            if len(moves) == 1:
+                self.last_stats = SearchStats(0, 0., 0.)
+                return self.masks.coord_of(moves[0])
+        # A playout budget is shared between the workers.
+        playouts = None if self.playouts is None else -(-self.playouts // self.workers)
+        seeds = [self._seed.getrandbits(32) for _ in range(self.workers)]
+
+        start = time.perf_counter()
+        if self.workers == 1:
+            results = [_search_worker(self.size, red, blue, turn, self.seconds, playouts, seeds[0], moves)]
+        else:
+            if self._pool is None:
+                self._pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+            futures = [self._pool.submit(_search_worker, self.size, red, blue, turn, self.seconds,
+                                         playouts, s, moves)
+                       for s in seeds]
+            results = [f.result() for f in futures]
+        seconds = time.perf_counter() - start
+
+        visits = collections.Counter()
+        count = 0
+        for children, playouts_done in results:
+            count += playouts_done
+            for move, (v, _) in children.items():
+                visits[move] += v
+        self.last_stats = SearchStats(count, seconds, count / seconds if seconds else 0.)
+        if not visits:
+            # The budget ran out before the first playout: any root move.
+            if moves is None:
+                moves = self.masks.iter_bits(self.masks.empty(red, blue))
+            return self.masks.coord_of(next(iter(moves)))
+        return self.masks.coord_of(visits.most_common(1)[0][0])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class BotController(SimpleController):
+    def __init__(self, game_view, player, bot_side=RED_PLAYER, hints=False):
+        self.player = player
+        self.bot_side = bot_side
+        super().__init__(game_view, hints)
+
+    def click_hex(self, hex_object):
+        if self.turn == self.bot_side:
+            return
+        super().click_hex(hex_object)
+        if not self.result and self.turn == self.bot_side:
+            # Let tkinter draw the human move before the bot starts thinking.
+            self.game_view.master.after(1, self._bot_move)
+
+    def _bot_move(self):
+        move = self.player.search(self.game_view.board, self.turn)
+        stats = self.player.last_stats
+        print('BOT: %i playouts in %.2f s (%.0f playouts/s)' % stats)
+        super().click_hex(move)
+
+    def update(self):
+        if not self.started and self.turn == self.bot_side:
+            self.game_view.master.after(1, self._bot_move)
+        super().update()
+
+
+if __name__ == '__main__':
+    import sys
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else PLAYGROUND_SIZE
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    player = MCTSPlayer(size, seconds=seconds)
+    game = Game(size)
+    controller = BotController(game, player, bot_side=BLUE_PLAYER)
+    game.bind_context(controller)
+    try:
+        controller.run_game()
+    finally:
+        player.close()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import collections
+import numpy
+import batch
+from board import Coord, RED_PLAYER, BLUE_PLAYER, RED_WIN, BLUE_WIN, CELL_EMPTY, CELL_RED, CELL_BLUE
+
+PlayoutResult = collections.namedtuple("PlayoutResult", ["red_wins", "blue_wins", "ownership"])
+
+
+# Random playouts of one position, K at a time: the empty cells of all K
+# copies are filled with one array operation and scored with the vectorised
+# flood fill of batch.py. ownership counts, per inner cell (indexed like
+# batch positions), how many playouts had it on the winning chain.
+class PlayoutEngine:
+    def __init__(self, size, seed=None):
+        self.size = size
+        self.random = numpy.random.default_rng(seed)
+
+    def fill(self, position, turn, count):
+        flat = position.reshape(-1)
+        empty = numpy.flatnonzero(flat == CELL_EMPTY)
+        # The side to move places the first, third, ... of the remaining
+        # stones, so it gets the larger half.
+        mover, other = (CELL_RED, CELL_BLUE) if turn == RED_PLAYER else (CELL_BLUE, CELL_RED)
+        colours = numpy.full(empty.size, other, dtype=numpy.int8)
+        colours[:(empty.size + 1) // 2] = mover
+
+        order = self.random.random((count, empty.size)).argsort(axis=1)
+        positions = numpy.repeat(flat[numpy.newaxis], count, axis=0)
+        positions[:, empty] = colours[order]
+        return positions.reshape(count, self.size, self.size)
+
+    def run(self, board, turn, count):
+        positions = self.fill(batch.to_position(board), turn, count)
+        red_reach, blue_reach = batch.reach_masks(positions)
+        winners = batch.winners_from_reach(red_reach, blue_reach)
+        chains = batch.winning_chains(positions, red_reach, blue_reach, winners)
+        return PlayoutResult(int((winners == RED_WIN).sum()), int((winners == BLUE_WIN).sum()),
+                             chains.sum(axis=0))
+
+    def heatmap(self, board, turn, count):
+        # Share of playouts in which each empty cell ended up on the winning
+        # chain, keyed by Coord.
+        result = self.run(board, turn, count)
+        return {Coord(col + (row + 1) // 2 + 1, row + 1): result.ownership[row, col] / count
+                for row, col in zip(*numpy.nonzero(batch.to_position(board) == CELL_EMPTY))}
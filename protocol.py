@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import collections
+import functools
+import struct
+
+# Every frame is a 2-byte length of the rest of the frame, the protocol
+# version, a one-letter command head and any number of unsigned 32-bit
+# values, all big-endian:
+#   'b' (size,)  's' (side,)  't' (turn,)  'o' (opponent exists,)  'm' (x, y)
+#   'r' (x, y) a move the server rejected  'w' (result,) the game is over
+VERSION = 1
+HEADER = struct.Struct('!HBc')
+LENGTH = struct.Struct('!H')
+VALUE_SIZE = 4
+RECEIVE_SIZE = 65536
+
+Command = collections.namedtuple("Command", ["head", "values"])
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _frame(count):
+    # Whole frame of a command with count values, and its length field.
+    frame = struct.Struct('!HBc%iI' % count)
+    return frame, frame.size - LENGTH.size
+
+
+@functools.lru_cache(maxsize=None)
+def _values(count):
+    return struct.Struct('!%iI' % count)
+
+
+def encode(head, values):
+    frame, length = _frame(len(values))
+    try:
+        return frame.pack(length, VERSION, head.encode('ascii'), *values)
+    except struct.error:
+        raise ValueError('values out of range: %r' % (values,))
+
+
+# Receive buffer of one connection: bytes are fed in as they arrive, in
+# pieces of any size, and every complete frame lands in `commands`.
+class FrameReader:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.commands = collections.deque()
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        start = 0
+        while len(buffer) - start >= HEADER.size:
+            length, version, head = HEADER.unpack_from(buffer, start)
+            end = start + LENGTH.size + length
+            if version != VERSION:
+                raise ProtocolError('unsupported protocol version %i' % version)
+            if length < HEADER.size - LENGTH.size or (length - HEADER.size + LENGTH.size) % VALUE_SIZE:
+                raise ProtocolError('bad frame length %i' % length)
+            if end > len(buffer):
+                break
+            try:
+                head = head.decode('ascii')
+            except UnicodeDecodeError:
+                raise ProtocolError('bad command head %r' % head)
+            values = _values((end - start - HEADER.size) // VALUE_SIZE).unpack_from(buffer, start + HEADER.size)
+            self.commands.append(Command(head, values))
+            start = end
+        del buffer[:start]
+
+
+# Send buffer of one connection. Queued frames go out together in as few
+# send() calls as the socket allows; whatever it does not take stays here.
+class FrameWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def __bool__(self):
+        return bool(self.buffer)
+
+    def queue(self, head, values):
+        self.buffer += encode(head, values)
+
+    def flush(self, connection):
+        # True once the buffer is empty.
+        if self.buffer:
+            try:
+                sent = connection.send(self.buffer)
+            except BlockingIOError:
+                sent = 0
+            del self.buffer[:sent]
+        return not self.buffer
+
+
+async def read_command(reader, frames):
+    # Next command from an asyncio stream, or None once it is closed.
+    while not frames.commands:
+        data = await reader.read(RECEIVE_SIZE)
+        if not data:
+            return None
+        frames.feed(data)
+    return frames.commands.popleft()
+
+
+if __name__ == '__main__':
+    # Self-check: frames survive any split, and malformed ones only ever
+    # raise ProtocolError.
+    data = encode('b', (11,)) + encode('m', (3, 4)) + encode('o', (1,))
+    reader = FrameReader()
+    for i in range(len(data)):
+        reader.feed(data[i:i + 1])
+    assert list(reader.commands) == [('b', (11,)), ('m', (3, 4)), ('o', (1,))]
+    for frame in (b'\x00\x02\x01\xff', b'\x00\x02\x09b', b'\x00\x03\x01b\x00', b'\x00\x00\x01b'):
+        try:
+            FrameReader().feed(frame)
+        except ProtocolError:
+            continue
+        raise AssertionError('accepted %r' % frame)
+    print('protocol: ok')
@@ -1,72 +1,113 @@
 #!/usr/bin/env python3
 
+import collections
+import itertools
 import socket
 import selectors
 import types
-import game
+import board
+from board import Coord, MatchBoard
+from protocol import FrameReader, FrameWriter, ProtocolError, RECEIVE_SIZE
 
 HOST = '127.0.0.1'
 PORT = 65431
-BUFFER_SIZE = 5
 
 
+# Player numbers come from a counter and are never reused. A game is the
+# (red, blue) pair of numbers, found through either player, and owns the
+# MatchBoard that judges its moves, unless `boards` is off for servers that
+# judge each match elsewhere; players whose opponent left stay in
+# _lost_players until they disconnect themselves.
 class GamesBase:
-    games = list()
-    _waiting_room = list()
-    players_data = dict()
-    _lost_players = list()
+    def __init__(self, size=board.PLAYGROUND_SIZE, boards=True):
+        self.size = size
+        self.with_boards = boards
+        self.games = dict()
+        self.boards = dict()
+        self.opponents = dict()
+        self.players_data = dict()
+        self._waiting_room = collections.deque()
+        self._waiting = set()
+        self._lost_players = set()
+        self._numbers = itertools.count(1)
 
     def add_player(self):
-        if not self._waiting_room:
-            side = game.RED_PLAYER
-            if not self.games:
-                number = 1
-            else:
-                number = max([c for g in self.games for c in g]) + 1
+        number = next(self._numbers)
+        opponent_number = self._pop_waiting()
+        if opponent_number is None:
+            side = board.RED_PLAYER
             self._waiting_room.append(number)
+            self._waiting.add(number)
         else:
-            side = game.BLUE_PLAYER
-            opponent_number = self._waiting_room.pop(0)
-            number = opponent_number + 1
-            self.games.append([opponent_number, number])
+            side = board.BLUE_PLAYER
+            game = (opponent_number, number)
+            self.games[opponent_number] = self.games[number] = game
+            if self.with_boards:
+                self.boards[game] = MatchBoard(self.size)
+            self.opponents[opponent_number] = number
+            self.opponents[number] = opponent_number
 
         self.players_data[number] = types.SimpleNamespace(
+            size=self.size,
             side=side,
-            turn=game.RED_PLAYER,
-            move=None
+            turn=board.RED_PLAYER,
         )
         return number
 
+    def _pop_waiting(self):
+        # Players who left the waiting room are only dropped from the set,
+        # so their stale deque entries are skipped here.
+        while self._waiting_room:
+            number = self._waiting_room.popleft()
+            if number in self._waiting:
+                self._waiting.discard(number)
+                return number
+        return None
+
     def remove_player(self, number):
-        if number in self._waiting_room:
-            self._waiting_room.remove(number)
+        self.players_data.pop(number, None)
+        if number in self._waiting:
+            self._waiting.discard(number)
             return
         if number in self._lost_players:
-            self._lost_players.remove(number)
+            self._lost_players.discard(number)
             return
-        to_remove = [g for g in self.games if number in g]
-        if to_remove:
-            for r in to_remove:
-                self._lost_players.append([i for i in r if i is not number][0])
-                self.games.remove(r)
+        opponent_number = self.opponents.pop(number, None)
+        if opponent_number is not None:
+            del self.opponents[opponent_number]
+            self.boards.pop(self.games[number], None)
+            del self.games[number]
+            del self.games[opponent_number]
+            self._lost_players.add(opponent_number)
 
     def check_have_pair(self, number):
-        if [p for p in self.games if number in p]:
-            return 1
-        else:
-            return 0
+        return 1 if number in self.opponents else 0
 
     def check_player_exist(self, number):
-        return number in self._waiting_room or number in self._lost_players
+        return number in self._waiting or number in self._lost_players
 
     def get_opponent(self, number):
-        game = [g for g in self.games if number in g][0]
-        return [c for c in game if c != number][0]
+        return self.opponents.get(number)
+
+    def play(self, number, move):
+        # The board of the player's game once the move is accepted, None
+        # when it is rejected or the player has no game.
+        game = self.games.get(number)
+        if game is None or not self.boards[game].play(move, self.players_data[number].side):
+            return None
+        return self.boards[game]
 
 
+# Every connection owns a FrameReader and a FrameWriter (see protocol).
+# Write interest is only registered while something is queued, so idle
+# games leave the selector blocked; everything queued for a connection in
+# one select round goes out in a single send().
 class Server:
     selector = selectors.DefaultSelector()
-    games_base = GamesBase()
+
+    def __init__(self, size=board.PLAYGROUND_SIZE):
+        self.games_base = GamesBase(size)
+        self.connections = dict()
 
     def accept(self, sock):
         connection, address = sock.accept()
@@ -74,66 +115,89 @@ class Server:
         connection.setblocking(False)
 
         player_number = self.games_base.add_player()
+        player_data = self.games_base.players_data[player_number]
 
-        events = selectors.EVENT_READ | selectors.EVENT_WRITE
         data = types.SimpleNamespace(
             player_number=player_number,
-            opponent_exist=False,
-            side_sent=False,
-            turn_sent=False,
+            frames=FrameReader(),
+            outbound=FrameWriter(),
+            writing=False,
         )
-        self.selector.register(connection, events, data)
+        self.selector.register(connection, selectors.EVENT_READ, data)
+        self.connections[player_number] = connection, data
+
+        self.queue(player_number, 'b', (player_data.size,))
+        self.queue(player_number, 's', (player_data.side,))
+        self.queue(player_number, 't', (player_data.turn,))
+        opponent_number = self.games_base.get_opponent(player_number)
+        if opponent_number is not None:
+            self.queue(player_number, 'o', (1,))
+            self.queue(opponent_number, 'o', (1,))
+            print('SERVER: pair ', opponent_number, player_number)
+
+    def queue(self, player_number, head, values):
+        connection, data = self.connections[player_number]
+        data.outbound.queue(head, values)
+        if not data.writing:
+            data.writing = True
+            self.selector.modify(connection, selectors.EVENT_READ | selectors.EVENT_WRITE, data)
+
+    def close(self, connection, data):
+        print('SERVER: closing', data.player_number)
+        opponent_number = self.games_base.get_opponent(data.player_number)
+        self.games_base.remove_player(data.player_number)
+        del self.connections[data.player_number]
+        self.selector.unregister(connection)
+        connection.close()
+        if opponent_number is not None:
+            self.queue(opponent_number, 'o', (0,))
+            print('SERVER: send opponent not exist for ', opponent_number)
 
     def service_connection(self, key, mask):
         connection, data = key.fileobj, key.data
-        player_data = self.games_base.players_data[data.player_number]
 
         if mask & selectors.EVENT_READ:
-            status, command = receive(connection)
-            print(status)
-            print(command)
-
-            if status and command.head == 'm':
-                player_data.move = command.values
-                print('SERVER" receive move ', command.values, ' from ', data.player_number)
-            else:
-                print('SERVER: closing', data.player_number)
-
-                self.games_base.remove_player(data.player_number)
-                self.selector.unregister(connection)
-                connection.close()
+            try:
+                received = connection.recv(RECEIVE_SIZE)
+                data.frames.feed(received)
+            except BlockingIOError:
+                received = None
+            except (ConnectionError, ProtocolError):
+                received = b''
+            if received == b'':
+                self.close(connection, data)
                 return
 
-        if mask & selectors.EVENT_WRITE:
-            if not data.side_sent:
-                send(connection, 's', (player_data.side,))
-                data.side_sent = True
-                print('SERVER: send side ', player_data.side, ' to ', data.player_number)
-
-            elif not data.turn_sent:
-                send(connection, 't', (player_data.turn,))
-                data.turn_sent = True
-                print('SERVER: send turn ', player_data.turn, ' to ', data.player_number)
-
-            elif data.opponent_exist and not self.games_base.check_have_pair(data.player_number):
-                send(connection, 'o', (0,))
-                data.opponent_exist = False
-                print('SERVER: send opponent not exist for ', data.player_number)
-
-            elif not data.opponent_exist and self.games_base.check_have_pair(data.player_number):
-                send(connection, 'o', (1,))
-                data.opponent_exist = True
-                print('SERVER: send opponent exist for ', data.player_number)
-
-            else:
-                have_opponent = self.games_base.check_have_pair(data.player_number)
-                if have_opponent:
+            while data.frames.commands:
+                command = data.frames.commands.popleft()
+                if command.head == 'm':
+                    print('SERVER" receive move ', command.values, ' from ', data.player_number)
+                    match = self.games_base.play(data.player_number, move_of(command))
+                    if match is None:
+                        self.queue(data.player_number, 'r', command.values)
+                        print('SERVER: reject move', command.values, ' from ', data.player_number)
+                        continue
                     opponent_number = self.games_base.get_opponent(data.player_number)
-                    opponent_data = self.games_base.players_data[opponent_number]
-                    if opponent_data.move:
-                        send(connection, 'm', opponent_data.move)
-                        print('SERVER: send move', opponent_data.move, ' to ', data.player_number)
-                        opponent_data.move = None
+                    self.queue(opponent_number, 'm', command.values)
+                    print('SERVER: send move', command.values, ' to ', opponent_number)
+                    if match.result:
+                        for number in data.player_number, opponent_number:
+                            self.queue(number, 'w', (match.result,))
+                        print('SERVER: game over', match.result)
+                else:
+                    self.close(connection, data)
+                    return
+
+        if mask & selectors.EVENT_WRITE:
+            try:
+                flushed = data.outbound.flush(connection)
+            except OSError:
+                # Reset or broken pipe: only this connection is lost.
+                self.close(connection, data)
+                return
+            if flushed:
+                data.writing = False
+                self.selector.modify(connection, selectors.EVENT_READ, data)
 
     def run(self):
         host, port = HOST, PORT
@@ -150,7 +214,7 @@ class Server:
                 for key, mask in events:
                     if key.data is None:
                         self.accept(key.fileobj)
-                    else:
+                    elif key.fileobj.fileno() != -1:
                         self.service_connection(key, mask)
         except KeyboardInterrupt:
             print("CLIENT: caught keyboard interrupt, exiting")
@@ -158,29 +222,14 @@ class Server:
             self.selector.close()
 
 
-def receive(connection):
-    recv_head = connection.recv(1)
-    if recv_head:
-        recv_data = connection.recv(4)
-        Command = types.SimpleNamespace(head=recv_head.decode('utf-8'),
-                                        values=(int(recv_data[:2]), int(recv_data[2:])))
-        return True, Command
-    else:
-        return False, None
-
-
-def send(connection, head, values):
-    if len(values) == 1:
-        command_values = 0, values[0]
-    elif len(values) == 2:
-        command_values = values[0], values[1]
-    else:
-        raise ValueError
-    command = head + ('%02i' % command_values[0]) + ('%02i' % command_values[1])
-    bytes_command = command.encode('utf-8')
-    connection.send(bytes_command)
+def move_of(command):
+    # The cell of an 'm' command, None when it does not carry two values.
+    return Coord(*command.values) if len(command.values) == 2 else None
 
 
 if __name__ == '__main__':
-    server = Server()
+    import sys
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else board.PLAYGROUND_SIZE
+    server = Server(size)
     server.run()
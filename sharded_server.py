@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+import array
+import asyncio
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import selectors
+import socket
+import board
+import server
+from async_server import AsyncServer
+from server import GamesBase
+
+# Largest matchmaker message; they are short JSON lists.
+MESSAGE_SIZE = 1024
+
+
+# Non-blocking end of a worker <-> matchmaker socket pair. Both sides send
+# bursts, so messages that do not fit are queued until flush() gets them
+# out; blocking sends could leave both processes waiting on each other.
+class Channel:
+    def __init__(self, sock):
+        sock.setblocking(False)
+        self.socket = sock
+        self.outbound = collections.deque()
+
+    def send(self, message, fds=(), close=False):
+        # With close, the passed descriptors are closed once sent. Returns
+        # False while something is still queued.
+        self.outbound.append((json.dumps(message).encode('utf-8'), list(fds), close))
+        return self.flush()
+
+    def flush(self):
+        while self.outbound:
+            data, fds, close = self.outbound[0]
+            ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))] if fds else []
+            try:
+                self.socket.sendmsg([data], ancillary)
+            except BlockingIOError:
+                return False
+            self.outbound.popleft()
+            if close:
+                for fd in fds:
+                    os.close(fd)
+        return True
+
+    def receive(self):
+        # sendmsg/recvmsg with SCM_RIGHTS rather than socket.send_fds and
+        # recv_fds, which are only there from Python 3.9.
+        fds = array.array('i')
+        data, ancillary, _, _ = self.socket.recvmsg(MESSAGE_SIZE, socket.CMSG_LEN(fds.itemsize))
+        for level, kind, payload in ancillary:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+        fds = list(fds)
+        if not data:
+            return None, fds
+        return json.loads(data), fds
+
+
+# Pairs the players of every worker with one GamesBase. A new player is
+# assigned to the worker it was accepted by, unless its opponent waits on
+# another worker: then the accepting worker sends the socket back here and
+# it is passed on to the worker owning the match.
+class Matchmaker:
+    def __init__(self, sockets, size=board.PLAYGROUND_SIZE):
+        self.channels = [Channel(s) for s in sockets]
+        # The workers judge the moves; only the pairing is kept here.
+        self.games_base = GamesBase(size, boards=False)
+        self.owners = dict()
+        self.selector = selectors.DefaultSelector()
+
+    def run(self):
+        for worker, channel in enumerate(self.channels):
+            self.selector.register(channel.socket, selectors.EVENT_READ, worker)
+        while True:
+            for key, mask in self.selector.select():
+                channel = self.channels[key.data]
+                if mask & selectors.EVENT_WRITE and channel.flush():
+                    self.selector.modify(channel.socket, selectors.EVENT_READ, key.data)
+                if mask & selectors.EVENT_READ:
+                    try:
+                        message, fds = channel.receive()
+                    except BlockingIOError:
+                        continue
+                    if message is None:
+                        return
+                    getattr(self, '_' + message[0])(key.data, *message[1:], fds=fds)
+
+    def send(self, worker, message, fds=()):
+        channel = self.channels[worker]
+        if not channel.send(message, fds, close=True):
+            self.selector.modify(channel.socket, selectors.EVENT_READ | selectors.EVENT_WRITE, worker)
+
+    def _join(self, worker, local, fds):
+        number = self.games_base.add_player()
+        player_data = self.games_base.players_data[number]
+        opponent_number = self.games_base.get_opponent(number)
+        owner = worker if opponent_number is None else self.owners[opponent_number]
+        self.owners[number] = owner
+        message = [number, player_data.size, player_data.side, opponent_number]
+        if owner == worker:
+            self.send(worker, ['assign', local] + message)
+        else:
+            self.send(worker, ['hand_over', local, owner] + message)
+
+    def _hand_over(self, worker, owner, number, size, side, opponent_number, fds):
+        self.send(owner, ['assign', None, number, size, side, opponent_number], fds)
+
+    def _leave(self, worker, number, fds):
+        self.games_base.remove_player(number)
+        self.owners.pop(number, None)
+
+
+# AsyncServer process accepting on the shared port. Players are numbered
+# and paired by the Matchmaker; matches run here as in AsyncServer.
+class ShardWorker(AsyncServer):
+    def __init__(self, sock, size=board.PLAYGROUND_SIZE):
+        super().__init__(size)
+        self.channel = Channel(sock)
+        self._flushing = False
+        self._joining = dict()
+        self._local_numbers = itertools.count()
+
+    async def handle(self, reader, writer):
+        local = next(self._local_numbers)
+        self._joining[local] = reader, writer
+        self.send(['join', local])
+
+    def send(self, message, fds=(), close=False):
+        if not self.channel.send(message, fds, close) and not self._flushing:
+            self._flushing = True
+            asyncio.get_running_loop().add_writer(self.channel.socket, self._flush)
+
+    def _flush(self):
+        if self.channel.flush():
+            self._flushing = False
+            asyncio.get_running_loop().remove_writer(self.channel.socket)
+
+    def _on_message(self):
+        try:
+            message, fds = self.channel.receive()
+        except BlockingIOError:
+            return
+        if message is None:
+            asyncio.get_running_loop().stop()
+            return
+        kind, local, *rest = message
+        if kind == 'assign':
+            task = asyncio.create_task(self._assign(local, fds, *rest))
+            self._matches.add(task)
+            task.add_done_callback(self._matches.discard)
+        elif kind == 'hand_over':
+            owner, *rest = rest
+            reader, writer = self._joining.pop(local)
+            connection = writer.get_extra_info('socket')
+            self.send(['hand_over', owner] + rest, [os.dup(connection.fileno())], close=True)
+            writer.close()
+
+    async def _assign(self, local, fds, number, size, side, opponent_number):
+        if local is None:
+            connection = socket.socket(fileno=fds[0])
+            reader, writer = await asyncio.open_connection(sock=connection)
+        else:
+            reader, writer = self._joining.pop(local)
+        await self.start_player(number, size, side, opponent_number, reader, writer)
+
+    def _leave(self, player):
+        self.send(['leave', player.number])
+        player.writer.close()
+
+    async def serve(self, host=None, port=None, ready=None):
+        asyncio.get_running_loop().add_reader(self.channel.socket, self._on_message)
+        host = server.HOST if host is None else host
+        port = server.PORT if port is None else port
+        listener = await asyncio.start_server(self.handle, host, port, backlog=4096, reuse_port=True)
+        if ready is not None:
+            ready(port)
+        async with listener:
+            await listener.serve_forever()
+
+
+def _run_matchmaker(channels, size):
+    Matchmaker(channels, size).run()
+
+
+def _run_worker(channel, size, port, ready):
+    try:
+        asyncio.run(ShardWorker(channel, size).serve(port=port, ready=ready))
+    except KeyboardInterrupt:
+        pass
+
+
+# N worker processes listen on the same HOST and PORT with SO_REUSEPORT, so
+# the kernel spreads the connections between them (Linux only).
+class ShardedServer:
+    def __init__(self, size=board.PLAYGROUND_SIZE, workers=None):
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            raise OSError('SO_REUSEPORT is not supported on this platform')
+        self.size = size
+        self.workers = workers or os.cpu_count() or 1
+        self.processes = list()
+
+    def start(self, port=None, ready=None):
+        port = server.PORT if port is None else port
+        pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _ in range(self.workers)]
+        matchmaker = multiprocessing.Process(target=_run_matchmaker, args=([p[0] for p in pairs], self.size),
+                                             daemon=True)
+        self.processes = [matchmaker] + [
+            multiprocessing.Process(target=_run_worker, args=(p[1], self.size, port, ready), daemon=True)
+            for p in pairs]
+        for process in self.processes:
+            process.start()
+        for pair in pairs:
+            for channel in pair:
+                channel.close()
+        print('SERVER: listen with %i workers' % self.workers)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+
+    def run(self):
+        self.start()
+        try:
+            for process in self.processes:
+                process.join()
+        except KeyboardInterrupt:
+            print("SERVER: caught keyboard interrupt, exiting")
+        finally:
+            self.stop()
+
+
+if __name__ == '__main__':
+    import sys
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else board.PLAYGROUND_SIZE
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    ShardedServer(size, workers).run()
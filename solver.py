@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+import collections
+import functools
+import os
+import struct
+import time
+from board import (Coord, Board, get_table, get_zobrist, RED_PLAYER, BLUE_PLAYER, RED_WIN,
+                   CELL_EMPTY, CELL_RED, CELL_BLUE)
+from evaluator import get_evaluator, UNREACHABLE
+from inferior import get_inferior
+from transposition import TranspositionTable
+
+Solution = collections.namedtuple("Solution", ["winner", "winning_moves", "nodes", "seconds"])
+
+STONES = {RED_PLAYER: CELL_RED, BLUE_PLAYER: CELL_BLUE}
+OPENINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'openings')
+OPENINGS_MAGIC = b'HXOP'
+OPENINGS_VERSION = 1
+
+
+# Exact solver for small boards: a depth-first win/loss alpha-beta (every
+# node is either a proven win or a proven loss for the side to move) over
+# Board.cells. Positions are memoised in a TranspositionTable keyed on the
+# Zobrist hash; inferior cells are never searched, and a chain of stones,
+# bridges and edge templates with disjoint empty carriers ends the search
+# early for whichever side owns it. Replies are limited to the carriers of
+# every connection the opponent could complete with one more stone.
+class Solver:
+    def __init__(self, size, memory_bytes=256 * 1024 * 1024):
+        self.size = size
+        self.table = get_table(size)
+        self.zobrist = get_zobrist(size)
+        self.edges = get_evaluator(size).edges
+        self._targets = dict()
+        for side, (_, target) in self.edges.items():
+            self._targets[side] = bytearray(len(self.table))
+            for i in target:
+                self._targets[side][i] = 1
+        self.inferior = get_inferior(size)
+        self.memo = TranspositionTable(memory_bytes)
+        self.connections = TranspositionTable(memory_bytes // 4)
+        self.nodes = 0
+
+        # Bridges by index. The boundary cells hold the colour of their
+        # side, so a bridge from the second row to the boundary is the edge
+        # template of a stone one row away from its edge.
+        index = self.table.index
+        self.bridges = [tuple((index[partner], index[carrier[0]], index[carrier[1]])
+                              for partner, carrier in self.table.bridges[c])
+                        for c in self.table.cells]
+        # Central cells first: they decide small boards most often.
+        middle = (size + 1) / 2
+        self.order = {i: abs(c.y - middle) + abs(c.x - c.y // 2 - middle)
+                      for i, c in enumerate(self.table.cells)}
+
+    def _key(self, key, turn):
+        return key ^ self.zobrist.turn if turn == BLUE_PLAYER else key
+
+    def connection(self, cells, side, key):
+        # Carrier cells of a virtual connection of `side` between its two
+        # edges (empty for a finished chain), or None. Paths using the fewest
+        # bridges are tried; one whose bridges share a carrier cell is not
+        # proof of anything, so it also gives None.
+        cache_key = self._key(key, side)
+        entry = self.connections.lookup(cache_key)
+        if entry is not None:
+            return entry.value
+
+        own = STONES[side]
+        neighbors = self.table.neighbor_indices
+        bridges = self.bridges
+        source, target = self.edges[side]
+        is_target = self._targets[side]
+        cost = [UNREACHABLE] * len(cells)
+        parent = [None] * len(cells)
+        done = bytearray(len(cells))
+        queue = collections.deque(source)
+        for i in source:
+            cost[i] = 0
+        found = None
+        while queue:
+            current = queue.popleft()
+            if done[current]:
+                continue
+            done[current] = 1
+            if is_target[current]:
+                found = current
+                break
+            d = cost[current]
+            for n in neighbors[current]:
+                if cells[n] == own and d < cost[n]:
+                    cost[n] = d
+                    parent[n] = (current, None)
+                    queue.appendleft(n)
+            for partner, c1, c2 in bridges[current]:
+                if (d + 1 < cost[partner] and cells[partner] == own
+                        and cells[c1] == CELL_EMPTY and cells[c2] == CELL_EMPTY):
+                    cost[partner] = d + 1
+                    parent[partner] = (current, (c1, c2))
+                    queue.append(partner)
+
+        carrier = None
+        if found is not None:
+            carrier = set()
+            step = parent[found]
+            while step is not None:
+                previous, pair = step
+                if pair is not None:
+                    if pair[0] in carrier or pair[1] in carrier:
+                        carrier = None
+                        break
+                    carrier.update(pair)
+                step = parent[previous]
+            if carrier is not None:
+                carrier = frozenset(carrier)
+        self.connections.store(cache_key, 0, carrier)
+        return carrier
+
+    def solve(self, board, turn):
+        # Proven winner of the position with `turn` to move, and every move
+        # that wins for it (empty when it loses).
+        start = time.perf_counter()
+        self.nodes = 0
+        cells = bytearray(board.cells)
+        key = board.hash
+        stone = STONES[turn]
+        winning_moves = set()
+        for i in sorted(self._empty(cells), key=self.order.get):
+            cells[i] = stone
+            child = key ^ self.zobrist.keys[turn][i]
+            if self.connection(cells, turn, child) == frozenset() or \
+                    not self._solve(cells, child, not turn):
+                winning_moves.add(self.table.cells[i])
+            cells[i] = CELL_EMPTY
+        winner = turn if winning_moves else int(not turn)
+        return Solution(winner, winning_moves, self.nodes, time.perf_counter() - start)
+
+    def winner(self, board, turn):
+        # Only the proven winner: the search stops at the first winning move.
+        if board.check_result():
+            return RED_PLAYER if board.result == RED_WIN else BLUE_PLAYER
+        return turn if self._solve(bytearray(board.cells), board.hash, turn) else int(not turn)
+
+    def _empty(self, cells):
+        return [i for i in self.inferior.rings if cells[i] == CELL_EMPTY]
+
+    def _solve(self, cells, key, turn):
+        # True when the side to move wins.
+        self.nodes += 1
+        node_key = self._key(key, turn)
+        entry = self.memo.lookup(node_key)
+        if entry is not None:
+            return entry.value
+
+        turn = int(turn)
+        other = int(not turn)
+        if self.connection(cells, turn, key) is not None:
+            self.memo.store(node_key, 0, True)
+            return True
+        if self.connection(cells, other, key) is not None:
+            self.memo.store(node_key, 0, False)
+            return False
+
+        moves = self.inferior.analyse(cells, turn)[3] or set(self._empty(cells))
+        # Every opponent move that would give it a virtual connection has to
+        # be answered inside that connection's carrier.
+        # Cells blocking the most threats are tried first.
+        threat = STONES[other]
+        blocks = collections.Counter()
+        for i in self._empty(cells):
+            cells[i] = threat
+            carrier = self.connection(cells, other, key ^ self.zobrist.keys[other][i])
+            cells[i] = CELL_EMPTY
+            if carrier is not None:
+                moves &= carrier | {i}
+                if not moves:
+                    self.memo.store(node_key, 0, False)
+                    return False
+                blocks.update(carrier | {i})
+
+        stone = STONES[turn]
+        best = None
+        for i in sorted(moves, key=lambda m: (-blocks[m], self.order[m])):
+            cells[i] = stone
+            child = key ^ self.zobrist.keys[turn][i]
+            wins = self.connection(cells, turn, child) == frozenset() or not self._solve(cells, child, other)
+            cells[i] = CELL_EMPTY
+            if wins:
+                best = i
+                break
+        self.memo.store(node_key, len(moves), best is not None, best)
+        return best is not None
+
+
+def build_openings(size, turn=RED_PLAYER, solver=None):
+    # Whether each first move of `turn` wins, by row and column. Turning the
+    # board by 180 degrees keeps the rules, so half of the moves are mirrored.
+    solver = solver or Solver(size)
+    wins = [[None] * size for _ in range(size)]
+    for row in range(size):
+        for col in range(size):
+            if wins[row][col] is not None:
+                continue
+            board = Board(size)
+            y = row + 1
+            board.add_hex(Coord(col + y // 2 + 1, y), turn)
+            wins[row][col] = solver.winner(board, not turn) == turn
+            wins[size - 1 - row][size - 1 - col] = wins[row][col]
+    return wins
+
+
+def openings_path(size, turn=RED_PLAYER):
+    return os.path.join(OPENINGS_DIR, 'hex%i_%s.bin' % (size, 'red' if turn == RED_PLAYER else 'blue'))
+
+
+# Opening tables are a small header followed by one bit per first move,
+# row by row.
+def save_openings(path, size, turn, wins):
+    bits = bytearray((size * size + 7) // 8)
+    for row in range(size):
+        for col in range(size):
+            if wins[row][col]:
+                i = row * size + col
+                bits[i // 8] |= 1 << i % 8
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(OPENINGS_MAGIC + struct.pack('BBB', OPENINGS_VERSION, size, turn) + bytes(bits))
+
+
+def load_openings(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != OPENINGS_MAGIC:
+        raise ValueError('%s is not an opening table' % path)
+    version, size, turn = struct.unpack('BBB', data[4:7])
+    if version != OPENINGS_VERSION:
+        raise ValueError('unsupported opening table version %i' % version)
+    bits = data[7:]
+    wins = [[bool(bits[(row * size + col) // 8] >> (row * size + col) % 8 & 1) for col in range(size)]
+            for row in range(size)]
+    return size, turn, wins
+
+
+@functools.lru_cache(maxsize=None)
+def get_openings(size, turn=RED_PLAYER):
+    # Saved opening table of the board size, or None when none was built.
+    path = openings_path(size, turn)
+    if not os.path.exists(path):
+        return None
+    return load_openings(path)[2]
+
+
+if __name__ == '__main__':
+    import sys
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    path = sys.argv[2] if len(sys.argv) > 2 else openings_path(size)
+    start = time.perf_counter()
+    table = build_openings(size)
+    save_openings(path, size, RED_PLAYER, table)
+    print('%ix%i openings solved in %.1f s, saved to %s' % (size, size, time.perf_counter() - start, path))
+    for row, line in enumerate(table):
+        print(' ' * row + ' '.join('W' if win else '.' for win in line))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import collections
+
+Entry = collections.namedtuple("Entry", ["depth", "generation", "value", "best_move", "visits"])
+
+# Rough cost of one slot in CPython: the key int, the Entry tuple with its
+# fields and the two list pointers.
+ENTRY_BYTES = 160
+BUCKET_SIZE = 4
+DEFAULT_MEMORY = 64 * 1024 * 1024
+
+
+# Fixed-size table of search results keyed by Zobrist hash (Board.hash).
+# Every key maps to a bucket of BUCKET_SIZE slots; when a bucket is full the
+# entry from the oldest search is replaced first, then the shallowest one.
+class TranspositionTable:
+    def __init__(self, memory_bytes=DEFAULT_MEMORY):
+        self.buckets = max(1, memory_bytes // (ENTRY_BYTES * BUCKET_SIZE))
+        self.capacity = self.buckets * BUCKET_SIZE
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        self.keys = [None] * self.capacity
+        self.entries = [None] * self.capacity
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def __len__(self):
+        return self.used
+
+    def new_search(self):
+        # Entries of earlier searches stay readable but are replaced first.
+        self.generation += 1
+
+    @property
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.
+
+    def _bucket(self, key):
+        start = key % self.buckets * BUCKET_SIZE
+        return range(start, start + BUCKET_SIZE)
+
+    def lookup(self, key):
+        for slot in self._bucket(key):
+            if self.keys[slot] == key:
+                self.hits += 1
+                return self.entries[slot]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, best_move=None, visits=0):
+        keys, entries = self.keys, self.entries
+        victim = None
+        for slot in self._bucket(key):
+            if keys[slot] == key:
+                # A shallower result of the current search never overwrites
+                # a deeper one for the same position.
+                old = entries[slot]
+                if old.generation == self.generation and old.depth > depth:
+                    return
+                victim = slot
+                break
+            if keys[slot] is None:
+                if victim is None or keys[victim] is not None:
+                    victim = slot
+            elif victim is None or (keys[victim] is not None
+                                    and self._worth(slot) < self._worth(victim)):
+                victim = slot
+
+        if keys[victim] is None:
+            self.used += 1
+        elif keys[victim] != key:
+            self.replacements += 1
+        keys[victim] = key
+        entries[victim] = Entry(depth, self.generation, value, best_move, visits)
+        self.stores += 1
+
+    def _worth(self, slot):
+        entry = self.entries[slot]
+        return entry.generation == self.generation, entry.depth
+
+    def stats(self):
+        return {'capacity': self.capacity, 'used': self.used, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate, 'stores': self.stores, 'replacements': self.replacements}